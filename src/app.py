@@ -1,70 +1,157 @@
-import yaml
-from pathlib import Path
-import json
-from tqdm import tqdm
-import argparse
+"""
+    python app.py upsert                        # index the wiki pages
+    python app.py query "Câu hỏi?" [--stream]   # answer a question
+    python app.py evaluate                      # run the RAG evaluation
+
+The older flags (``--upsert``, ``--query "..."``, ``--stream``,
+``--evaluate``) still work and can be combined in one run.
 
-from indexer.pinecone import PineconeIndex
-from indexer.utils import rechunking
-from engine.rag_engine import RAGEngine
-from generator.groq_model import GroqModel
+Heavy dependencies (torch / sentence_transformers, pinecone, groq,
+llama_index) are imported by the commands that use them and models load on
+first use, so ``--help`` and each command only pay for what they run.
+"""
 
-parser = argparse.ArgumentParser()
-parser.add_argument("--upsert", action="store_true", help="Upsert wiki pages to Pinecone")
-parser.add_argument("--query", required=False, type=str, help="Query to search in Pinecone")
-parser.add_argument("--evaluate", action="store_true", help="Run RAG evaluation")
-args = parser.parse_args()
+import argparse
+from pathlib import Path
+
+import yaml
 
-with open("config.yaml", "r") as file:
-    config = yaml.safe_load(file)
+from engine.tracing import create_tracer
 
-pinecone_config = config.get("pinecone")
-generator_config = config.get("generator")
 
 def find_json_files(folder_path):
     folder = Path(folder_path)
     return list(folder.glob("*.json"))
 
-if __name__ == "__main__":
-    indexer = PineconeIndex(
-        index_name=pinecone_config["index_name"],
-        model_name=pinecone_config["model_name"],
-        dimension=pinecone_config["dimension"],
+
+def upsert(config, indexer):
+    # Upserting all wiki pages
+    from indexer.pipeline import IngestionPipeline
+    from indexer.utils import rechunking
+
+    print("Upserting all wiki pages...")
+    json_files = find_json_files(config["wiki_data"])
+    pipeline = IngestionPipeline(indexer, chunker=rechunking, **(config.get("ingestion") or {}))
+    stats = pipeline.run(json_files)
+    stats["removed"] += indexer.remove_sources(json_files)
+    print(
+        f"Added {stats['added']} chunks, removed {stats['removed']}, "
+        f"kept {stats['unchanged']}, skipped {stats['skipped_files']} unchanged files "
+        f"in {stats['wall_seconds']:.1f}s."
     )
-    generator = GroqModel(
-        model_name=generator_config["model_name"],
+    for name, stage in stats["stages"].items():
+        print(
+            f"  {name:<7} busy {stage['busy_seconds']:.1f}s, "
+            f"{stage['files_per_second']:.2f} files/s, {stage['chunks_per_second']:.1f} chunks/s"
+        )
+    timings = indexer.embedding_model.stats()
+    print(
+        f"Embedded {timings['texts']} texts: segmentation {timings['segment_seconds']:.1f}s, "
+        f"model {timings['model_seconds']:.1f}s."
     )
-    engine = RAGEngine(indexer=indexer, generator=generator)
 
-    # Upserting all wiki pages
-    if args.upsert:
-        print("Upserting all wiki pages...")
-        json_files = find_json_files(config["wiki_data"])
-        for file in tqdm(json_files, desc="Processing JSON files", unit="file"):
-            with open(file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            texts = rechunking(data["raw_content"]["content"])
-            indexer.upsert_texts(texts, file_source=file)
-
-    if args.query:
+
+def query(config, indexer, question, stream=False, top_k=5):
+    from engine.rag_engine import RAGEngine
+    from engine.reranker import create_reranker
+    from generator.factory import create_generator
+
+    engine = RAGEngine(
+        indexer=indexer,
+        generator=create_generator(config),
+        reranker=create_reranker(config),
+        **(config.get("engine") or {}),
+    )
+    if stream:
+        print(f"Query: {question}")
+        print("Response: ", end="", flush=True)
+        for token in engine.stream_answer(question, top_k):
+            print(token, end="", flush=True)
+        print()
+        stats = engine.last_stream_stats
+        if stats["time_to_first_token"] is not None:
+            print(
+                f"Time to first token: {stats['time_to_first_token']:.2f}s "
+                f"(retrieval {stats['retrieval_time']:.2f}s, total {stats['total_time']:.2f}s)"
+            )
+    else:
         print("Searching for query...")
-        response = engine.generate_answer(args.query)
-        print(f"Query: {args.query}")
+        response = engine.generate_answer(question, top_k)
+        print(f"Query: {question}")
         print(f"Response: {response}")
-    
+
+
+def evaluate(config):
     # Run evaluation
-    if args.evaluate:
-        print("Running RAG evaluation...")
-        try:
-            from eval import RAGEvaluator
-            evaluator = RAGEvaluator("config.yaml")
-            results = evaluator.run_full_evaluation(
-                wiki_data_path=config["wiki_data"],
-                output_path="evaluation_results.json"
-            )
-            print("Evaluation completed successfully!")
-        except ImportError:
-            print("Error: Evaluation dependencies not installed.")
-            print("Please install: pip install -r eval_requirements.txt")
-        except Exception as e:
-            print(f"Error during evaluation: {e}")
\ No newline at end of file
+    print("Running RAG evaluation...")
+    try:
+        from eval import RAGEvaluator
+        evaluator = RAGEvaluator("config.yaml")
+        evaluator.run_full_evaluation(
+            wiki_data_path=config["wiki_data"],
+            output_path="evaluation_results.json"
+        )
+        print("Evaluation completed successfully!")
+    except ImportError:
+        print("Error: Evaluation dependencies not installed.")
+        print("Please install: pip install -r eval_requirements.txt")
+    except Exception as e:
+        print(f"Error during evaluation: {e}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="RAG over the VNU wiki pages",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    commands = parser.add_subparsers(dest="command", metavar="{upsert,query,evaluate}")
+    commands.add_parser("upsert", help="Upsert wiki pages to the vector index")
+    query_parser = commands.add_parser("query", help="Answer a question from the vector index")
+    query_parser.add_argument("question", help="Question to answer")
+    query_parser.add_argument("--stream", action="store_true", help="Print the answer as it is generated")
+    query_parser.add_argument("--top_k", type=int, default=5, help="Chunks retrieved for the prompt")
+    commands.add_parser("evaluate", help="Run RAG evaluation")
+
+    legacy = parser.add_argument_group("flags (same as the commands, kept for existing scripts)")
+    legacy.add_argument("--upsert", action="store_true", help="Upsert wiki pages to the vector index")
+    legacy.add_argument("--query", dest="legacy_query", type=str, help="Query to search in the vector index")
+    legacy.add_argument("--stream", dest="legacy_stream", action="store_true",
+                        help="Print the answer to --query as it is generated")
+    legacy.add_argument("--evaluate", action="store_true", help="Run RAG evaluation")
+    return parser
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+
+    run_upsert = args.command == "upsert" or args.upsert
+    run_evaluate = args.command == "evaluate" or args.evaluate
+    if args.command == "query":
+        question, stream, top_k = args.question, args.stream, args.top_k
+    else:
+        question, stream, top_k = args.legacy_query, args.legacy_stream, 5
+    if not (run_upsert or question or run_evaluate):
+        parser.print_help()
+        return
+
+    with open("config.yaml", "r") as file:
+        config = yaml.safe_load(file)
+    create_tracer(config)
+
+    indexer = None
+    if run_upsert or question:
+        # Shared by upsert and query so the embedding model loads once
+        from indexer.factory import create_indexer
+        indexer = create_indexer(config)
+    if run_upsert:
+        upsert(config, indexer)
+    if question:
+        query(config, indexer, question, stream, top_k)
+    if run_evaluate:
+        evaluate(config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Recall / latency trade-off of the IVF index against exact LocalIndex search.
+
+    python -m benchmarks.ann --num_vectors 200000 --nlist 512 --nprobe 4 8 16 32
+    python -m benchmarks.ann --from_index index_store/vnu-wikis --nlist 16
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+from benchmarks.common import (
+    NoEmbedder,
+    latency_summary,
+    load_local_vectors,
+    recall_at_k,
+    synthetic_queries,
+    synthetic_vectors,
+    timed_queries,
+)
+from indexer.ivf import IVFIndex
+from indexer.local import LocalIndex
+
+
+def fill(index, vectors, batch_size=10000):
+    ids = [str(i) for i in range(len(vectors))]
+    for start in range(0, len(vectors), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        index.upsert_vectors(batch_ids, vectors[start:start + batch_size], [{} for _ in batch_ids])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--num_vectors", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--num_queries", type=int, default=200)
+    parser.add_argument("--top_k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--train_iterations", type=int, default=20)
+    parser.add_argument("--from_index", help="Benchmark on the vectors of an existing local index")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if args.from_index:
+        vectors = load_local_vectors(args.from_index)
+    else:
+        vectors = synthetic_vectors(args.num_vectors, args.dimension)
+    queries = synthetic_queries(vectors, args.num_queries)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exact = LocalIndex("bench-exact", None, vectors.shape[1], f"{tmp}/exact",
+                           embedding_model=NoEmbedder())
+        fill(exact, vectors)
+        exact_results, exact_latencies = timed_queries(exact, queries, args.top_k)
+
+        ivf = IVFIndex("bench-ivf", None, vectors.shape[1], f"{tmp}/ivf",
+                       embedding_model=NoEmbedder(), nlist=args.nlist,
+                       train_iterations=args.train_iterations, train_size=len(vectors) + 1)
+        fill(ivf, vectors)
+        start = time.perf_counter()
+        ivf.train()
+        train_seconds = time.perf_counter() - start
+
+        report = {
+            "num_vectors": len(vectors),
+            "dimension": vectors.shape[1],
+            "nlist": len(ivf.centroids),
+            "train_seconds": train_seconds,
+            "exact": latency_summary(exact_latencies),
+            "ivf": [],
+        }
+        for nprobe in args.nprobe:
+            ivf.nprobe = nprobe
+            results, latencies = timed_queries(ivf, queries, args.top_k)
+            report["ivf"].append({
+                "nprobe": nprobe,
+                f"recall_at_{args.top_k}": recall_at_k(results, exact_results),
+                **latency_summary(latencies),
+            })
+
+    print(
+        f"{len(vectors)} vectors x {vectors.shape[1]} dims, nlist={report['nlist']}, "
+        f"trained in {train_seconds:.1f}s, top_k={args.top_k}"
+    )
+    print(f"{'search':<14}{'recall':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    exact_summary = report["exact"]
+    print(f"{'exact':<14}{1.0:>8.3f}{exact_summary['p50_ms']:>9.2f}"
+          f"{exact_summary['p95_ms']:>9.2f}{exact_summary['p99_ms']:>9.2f}")
+    for run in report["ivf"]:
+        print(f"{'nprobe=' + str(run['nprobe']):<14}{run[f'recall_at_{args.top_k}']:>8.3f}"
+              f"{run['p50_ms']:>9.2f}{run['p95_ms']:>9.2f}{run['p99_ms']:>9.2f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import json
+import os
+import time
+
+import numpy as np
+
+
+class NoEmbedder:
+    """Placeholder embedder for benchmark indexes fed with precomputed vectors."""
+
+    def encode(self, texts, batch_size=None):
+        raise RuntimeError("Benchmark indexes only take precomputed vectors.")
+
+
+def synthetic_vectors(num_vectors, dimension, num_clusters=64, seed=0):
+    """Clustered random vectors, closer to real embeddings than pure noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_clusters, dimension)).astype(np.float32)
+    assignments = rng.integers(num_clusters, size=num_vectors)
+    noise = rng.standard_normal((num_vectors, dimension)).astype(np.float32)
+    return centers[assignments] + 0.8 * noise
+
+
+def synthetic_queries(vectors, num_queries, seed=1):
+    """Perturbed copies of random corpus vectors."""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(len(vectors), size=num_queries)
+    noise = rng.standard_normal((num_queries, vectors.shape[1])).astype(np.float32)
+    return vectors[picks] + 0.5 * noise
+
+
+def load_local_vectors(path):
+    """Float vectors of an existing ``LocalIndex`` directory (real embeddings)."""
+    with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    vectors = np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r")
+    return np.array(vectors.reshape(-1, meta["dimension"])[:len(meta["ids"])])
+
+
+def recall_at_k(results, exact_results):
+    """Mean fraction of the exact top-k ids found by an approximate search."""
+    recalls = []
+    for result, exact in zip(results, exact_results):
+        exact_ids = {match.id for match in exact.matches}
+        found = {match.id for match in result.matches}
+        recalls.append(len(exact_ids & found) / len(exact_ids) if exact_ids else 1.0)
+    return float(np.mean(recalls))
+
+
+def timed_queries(index, queries, top_k):
+    """Run queries one by one, returning results and per-query latencies in ms."""
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(index.query(query, top_k))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, latencies
+
+
+def latency_summary(latencies_ms):
+    return {
+        "mean_ms": float(np.mean(latencies_ms)),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+    }
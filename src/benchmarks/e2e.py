@@ -0,0 +1,247 @@
+"""
+End-to-end latency and throughput of ``RAGEngine`` with local backends.
+
+    python -m benchmarks.e2e --output e2e.json
+    python -m benchmarks.e2e --index index_store/vnu-wikis --concurrency 1 4 16 --generator replay
+
+Runs the questions of ``data/test`` and ``data/train`` (synthetic questions
+about the wiki pages when those files are empty) through the engine and
+reports p50/p95/p99 per stage (tokenize, encode, search, prompt, generate)
+from a sequential pass, throughput and end-to-end latency at several
+concurrency levels, CLI startup time (``app.py`` and each command's
+``--help``, i.e. imports and argument parsing), model load time and peak RSS.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from benchmarks.common import latency_summary
+from engine.rag_engine import RAGEngine
+from engine.reranker import create_reranker
+from generator.factory import GENERATOR_BACKENDS, create_generator
+from indexer.factory import create_embedder
+from indexer.local import LocalIndex
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+STAGES = ("tokenize", "encode", "search", "prompt", "generate", "total")
+CLI_COMMANDS = (["--help"], ["upsert", "--help"], ["query", "--help"], ["evaluate", "--help"])
+
+QUESTION_TEMPLATES = [
+    "{} là gì?",
+    "Khi nào {} được thành lập?",
+    "Địa chỉ của {} ở đâu?",
+    "Lịch sử phát triển của {} như thế nào?",
+    "Cơ cấu tổ chức của {} ra sao?",
+]
+
+
+def load_questions(paths, wiki_data, limit):
+    questions = []
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                questions += [line.strip() for line in f if line.strip()]
+    if not questions:
+        titles = [file.stem.replace("_", " ") for file in sorted(Path(wiki_data).glob("*.json"))]
+        questions = [template.format(title) for template in QUESTION_TEMPLATES for title in titles]
+    return questions[:limit]
+
+
+def build_corpus_index(path, wiki_data, embedding_model, dimension, max_chunks):
+    """Temporary ``LocalIndex`` with the wiki paragraphs as chunks (no chunker needed)."""
+    index = LocalIndex("bench-e2e", None, dimension, path, embedding_model=embedding_model)
+    remaining = max_chunks
+    for file in sorted(Path(wiki_data).glob("*.json")):
+        if remaining <= 0:
+            break
+        with open(file, "r", encoding="utf-8") as f:
+            paragraphs = [p for p in json.load(f)["raw_content"]["content"] if len(p.strip()) > 50]
+        if paragraphs[:remaining]:
+            index.upsert_texts(paragraphs[:remaining], str(file))
+        remaining -= len(paragraphs)
+    return index
+
+
+def measure_cli_startup(arguments, repeats=3):
+    """
+    Median wall time of ``python app.py <arguments>``, or None if the
+    command fails in this environment.
+    """
+    command = " ".join(["app.py", *arguments])
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, "app.py", *arguments], cwd=SRC_DIR,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=False)
+        if completed.returncode != 0:
+            print(f"{command} failed, startup time not measured: {completed.stderr.decode()[-200:]}")
+            return None
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def disable_query_caches(embedder):
+    """
+    Turn off the embedder's caches once the index is built: the embedding
+    cache and the segmentation memo would otherwise answer repeated
+    questions (warmup, then every pass) without segmenting or encoding.
+    """
+    embedder.cache = None
+    with embedder.segmenter.lock:
+        embedder.segmenter.memo_size = 0
+        embedder.segmenter.memo.clear()
+
+
+def stage_pass(engine, questions, top_k):
+    """
+    Sequential queries with per-stage timings (ms). Tokenization and
+    encoding come from the embedder's counters, search is the rest of the
+    retrieval (index query, hybrid fusion and reranking).
+    """
+    embedder = engine.indexer.embedding_model
+    stages = {stage: [] for stage in STAGES}
+    for question in questions:
+        before = embedder.stats()
+        result = engine.query(question, top_k, use_history=False)
+        after = embedder.stats()
+        tokenize = after["segment_seconds"] - before["segment_seconds"]
+        encode = after["model_seconds"] - before["model_seconds"]
+        timings = {
+            "tokenize": tokenize,
+            "encode": encode,
+            "search": max(result.timings["retrieve"] - tokenize - encode, 0.0),
+            "prompt": result.timings["prompt"],
+            "generate": result.timings["generate"],
+            "total": sum(result.timings.values()),
+        }
+        for stage, seconds in timings.items():
+            stages[stage].append(seconds * 1000)
+    return {stage: latency_summary(latencies) for stage, latencies in stages.items()}
+
+
+def throughput_pass(engine, questions, top_k, concurrency):
+    latencies = []
+
+    def run(question):
+        start = time.perf_counter()
+        engine.query(question, top_k, use_history=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run, questions))
+    wall = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": len(questions),
+        "wall_seconds": wall,
+        "queries_per_second": len(questions) / wall,
+        **latency_summary(latencies),
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--questions", nargs="+",
+                        default=["../data/test/question.txt", "../data/train/question.txt"])
+    parser.add_argument("--num_questions", type=int, default=100)
+    parser.add_argument("--index", help="Existing LocalIndex directory (default: temporary index of the wiki paragraphs)")
+    parser.add_argument("--max_chunks", type=int, default=2000, help="Chunks of the temporary index")
+    parser.add_argument("--generator", choices=GENERATOR_BACKENDS, default="stub")
+    parser.add_argument("--top_k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--engine_cache", action="store_true",
+                        help="Keep the engine's query caches, the embedding cache and the segmentation "
+                             "memo (default: disabled so every query hits every stage)")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as file:
+        config = yaml.safe_load(file)
+    report = {"startup": {
+        "cli_seconds": {
+            " ".join(arguments): measure_cli_startup(arguments) for arguments in CLI_COMMANDS
+        },
+    }}
+
+    questions = load_questions(args.questions, config["wiki_data"], args.num_questions)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        embedder = create_embedder(config)
+        dimension = config["pinecone"]["dimension"]
+        if args.index:
+            index = LocalIndex("bench-e2e", None, dimension, args.index, embedding_model=embedder)
+        else:
+            index = build_corpus_index(f"{tmp}/index", config["wiki_data"], embedder, dimension, args.max_chunks)
+        report["startup"]["index_seconds"] = time.perf_counter() - start
+        report["startup"]["model_load_seconds"] = embedder.stats()["load_seconds"]
+
+        engine_config = dict(config.get("engine") or {})
+        if not args.engine_cache:
+            engine_config["cache_size"] = 0
+            disable_query_caches(embedder)
+        engine = RAGEngine(
+            indexer=index,
+            generator=create_generator(config, args.generator),
+            reranker=create_reranker(config),
+            **engine_config,
+        )
+        for question in questions[:args.warmup]:
+            engine.query(question, args.top_k, use_history=False)
+
+        report.update({
+            "questions": len(questions),
+            "chunks": len(index),
+            "generator": args.generator,
+            "top_k": args.top_k,
+            "stages_ms": stage_pass(engine, questions, args.top_k),
+            "throughput": [
+                throughput_pass(engine, questions, args.top_k, concurrency)
+                for concurrency in args.concurrency
+            ],
+        })
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    print(f"{report['questions']} questions, {report['chunks']} chunks, generator={args.generator}")
+    print("CLI startup: " + ", ".join(
+        f"app.py {command} {'n/a' if seconds is None else f'{seconds:.2f}s'}"
+        for command, seconds in report["startup"]["cli_seconds"].items()
+    ))
+    print(f"Embedder + index ready in {report['startup']['index_seconds']:.1f}s "
+          f"(model load {report['startup']['model_load_seconds']:.1f}s)")
+    print(f"{'stage':<10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for stage, summary in report["stages_ms"].items():
+        print(f"{stage:<10}{summary['p50_ms']:>9.2f}{summary['p95_ms']:>9.2f}{summary['p99_ms']:>9.2f}")
+    print(f"{'workers':<10}{'qps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for run in report["throughput"]:
+        print(f"{run['concurrency']:<10}{run['queries_per_second']:>9.2f}"
+              f"{run['p50_ms']:>9.2f}{run['p95_ms']:>9.2f}{run['p99_ms']:>9.2f}")
+    print(f"Peak RSS {report['peak_rss_mb']['self']:.0f} MB (children {report['peak_rss_mb']['children']:.0f} MB)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
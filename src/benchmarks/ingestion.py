@@ -0,0 +1,110 @@
+"""
+Ingestion throughput of the wiki pages with and without the segmentation
+process pool.
+
+    python -m benchmarks.ingestion
+    python -m benchmarks.ingestion --workers 0 2 8 --max_files 100 --output ingestion.json
+
+Runs ``IngestionPipeline`` into a temporary ``LocalIndex`` once per
+``segmentation.workers`` value and reports the wall time, segmentation and
+model time, and how many texts the ``Segmenter`` handled in-process versus
+on its process pool.
+"""
+
+import argparse
+import copy
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import yaml
+
+from embedder.segmentation import segment_texts
+from indexer.factory import create_embedder
+from indexer.local import LocalIndex
+from indexer.pipeline import IngestionPipeline
+
+
+def paragraph_chunker(paragraphs, max_chars=2000):
+    """Paragraphs packed into chunks of about ``max_chars`` (stand-in for the llama_index splitter)."""
+    chunks, current = [], ""
+    for paragraph in paragraphs:
+        if current and len(current) + len(paragraph) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {paragraph}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def load_chunker():
+    try:
+        from indexer.utils import rechunking
+        return rechunking, "llama_index"
+    except ImportError:
+        print("llama_index not installed, chunking by paragraphs")
+        return paragraph_chunker, "paragraphs"
+
+
+def ingest(config, files, workers, path, chunker):
+    config = copy.deepcopy(config)
+    config.setdefault("segmentation", {})["workers"] = workers
+    # Fresh embedder per run: its segmentation memo would hide the second run's work
+    embedder = create_embedder(config)
+    index = LocalIndex("bench-ingestion", None, config["pinecone"]["dimension"], path,
+                       embedding_model=embedder)
+    try:
+        stats = IngestionPipeline(index, chunker=chunker, **(config.get("ingestion") or {})).run(files)
+    finally:
+        embedder.segmenter.close()
+    return {
+        "workers": embedder.segmenter.workers,
+        "files": len(files),
+        "chunks": stats["added"],
+        "wall_seconds": stats["wall_seconds"],
+        "embedder": embedder.stats(),
+        "segmenter": embedder.segmenter.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--wiki_data", help="Folder of wiki JSON files (default: wiki_data of the config)")
+    parser.add_argument("--max_files", type=int, default=None)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, os.cpu_count() or 1],
+                        help="segmentation.workers values to compare (0 = in-process only)")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as file:
+        config = yaml.safe_load(file)
+    files = sorted(Path(args.wiki_data or config["wiki_data"]).glob("*.json"))[:args.max_files]
+    chunker, chunker_name = load_chunker()
+    # Load pyvi's model up front so the first run does not pay for it alone
+    segment_texts(["Đại học Quốc gia Hà Nội"])
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            runs.append(ingest(config, files, workers, f"{tmp}/index-{workers}", chunker))
+    report = {"chunker": chunker_name, "runs": runs}
+
+    print(f"{len(files)} files, chunker={chunker_name}")
+    print(f"{'workers':<9}{'chunks':>8}{'wall s':>9}{'segment s':>11}{'model s':>9}"
+          f"{'pool calls':>12}{'pool texts':>12}{'inline texts':>14}")
+    for run in runs:
+        segmenter = run["segmenter"]
+        print(f"{run['workers']:<9}{run['chunks']:>8}{run['wall_seconds']:>9.2f}"
+              f"{run['embedder']['segment_seconds']:>11.2f}{run['embedder']['model_seconds']:>9.2f}"
+              f"{segmenter['parallel_calls']:>12}{segmenter['parallel_texts']:>12}"
+              f"{segmenter['inline_texts']:>14}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
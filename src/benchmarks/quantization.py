@@ -0,0 +1,126 @@
+"""
+Memory / latency / recall@k of the LocalIndex quantization modes against
+exact float32 search. Memory is reported both as the bytes a query scans
+and as the bytes stored (the float32 matrix is kept next to the codes for
+rescoring).
+
+    python -m benchmarks.quantization --num_vectors 100000
+    python -m benchmarks.quantization --from_index index_store/vnu-wikis
+"""
+
+import argparse
+import json
+import tempfile
+
+from benchmarks.common import (
+    NoEmbedder,
+    latency_summary,
+    load_local_vectors,
+    recall_at_k,
+    synthetic_queries,
+    synthetic_vectors,
+    timed_queries,
+)
+from indexer.local import LocalIndex
+
+
+def build_index(path, vectors, quantization, rescore_factor):
+    index = LocalIndex(
+        index_name=f"bench-{quantization}",
+        model_name=None,
+        dimension=vectors.shape[1],
+        path=path,
+        embedding_model=NoEmbedder(),
+        quantization=quantization,
+        rescore_factor=rescore_factor,
+    )
+    ids = [str(i) for i in range(len(vectors))]
+    for start in range(0, len(vectors), 10000):
+        index.upsert_vectors(
+            ids[start:start + 10000],
+            vectors[start:start + 10000],
+            [{} for _ in ids[start:start + 10000]],
+        )
+    return index
+
+
+def scanned_bytes(index):
+    """Bytes read by the first pass of every query."""
+    count = len(index)
+    if index.quantization == "none":
+        return index.vectors[:count].nbytes
+    total = index.codes[:count].nbytes
+    if index.scales is not None:
+        total += index.scales[:count].nbytes
+    return total
+
+
+def stored_bytes(index):
+    """Bytes of the float32 matrix plus the codes and scales of every stored vector."""
+    count = len(index)
+    return sum(
+        matrix[:count].nbytes
+        for matrix in (index.vectors, index.codes, index.scales)
+        if matrix is not None
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--num_vectors", type=int, default=50000)
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--num_queries", type=int, default=200)
+    parser.add_argument("--top_k", type=int, default=10)
+    parser.add_argument("--rescore_factor", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--from_index", help="Benchmark on the vectors of an existing local index")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if args.from_index:
+        vectors = load_local_vectors(args.from_index)
+    else:
+        vectors = synthetic_vectors(args.num_vectors, args.dimension)
+    queries = synthetic_queries(vectors, args.num_queries)
+
+    report = {"num_vectors": len(vectors), "dimension": vectors.shape[1], "modes": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        exact_index = build_index(f"{tmp}/none", vectors, "none", 1)
+        exact_results, latencies = timed_queries(exact_index, queries, args.top_k)
+        runs = [("none", 1, exact_index, exact_results, latencies)]
+        for quantization in ("int8", "binary"):
+            index = build_index(f"{tmp}/{quantization}", vectors, quantization, 1)
+            for rescore_factor in args.rescore_factor:
+                index.rescore_factor = rescore_factor
+                results, latencies = timed_queries(index, queries, args.top_k)
+                runs.append((quantization, rescore_factor, index, results, latencies))
+
+        for quantization, rescore_factor, index, results, latencies in runs:
+            scanned = scanned_bytes(index)
+            stored = stored_bytes(index)
+            report["modes"].append({
+                "quantization": quantization,
+                "rescore_factor": rescore_factor,
+                "scanned_bytes": scanned,
+                "scanned_bytes_per_vector": scanned / len(vectors),
+                "stored_bytes": stored,
+                "stored_bytes_per_vector": stored / len(vectors),
+                f"recall_at_{args.top_k}": recall_at_k(results, exact_results),
+                **latency_summary(latencies),
+            })
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, top_k={args.top_k}")
+    print(f"{'mode':<8}{'rescore':>8}{'scanned B/vec':>15}{'stored B/vec':>14}"
+          f"{'recall':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    for mode in report["modes"]:
+        print(
+            f"{mode['quantization']:<8}{mode['rescore_factor']:>8}"
+            f"{mode['scanned_bytes_per_vector']:>15.0f}{mode['stored_bytes_per_vector']:>14.0f}"
+            f"{mode[f'recall_at_{args.top_k}']:>8.3f}{mode['p50_ms']:>9.2f}{mode['p95_ms']:>9.2f}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,11 @@
 from typing import Tuple, List, Optional
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from urllib.parse import unquote, urldefrag, urljoin, urlparse
+import argparse
+import hashlib
+import threading
+import time
 import validators
 from bs4 import BeautifulSoup
 import re
@@ -7,38 +14,95 @@ from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
 
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
 
-def validate_wiki_url(url: str) -> Tuple[bool, str]:
+WIKI_DOMAINS = ["wikipedia.org", "en.wikipedia.org", "vi.wikipedia.org", "de.wikipedia.org"]
+USER_AGENT = "uet-RAG-crawler/1.0 (+https://github.com/HvTung04/uet-RAG)"
+
+
+def validate_wiki_url(url: str, allowed_domains: Optional[List[str]] = None) -> Tuple[bool, str]:
     """
     Validate if the given URL is a valid Wikipedia URL
     
     Args:
         url (str): URL to validate
+        allowed_domains (List[str], optional): Hosts to accept instead of
+            Wikipedia (e.g. ``["127.0.0.1"]`` for a local test server)
         
     Returns:
         Tuple[bool, str]: (is_valid, message)
     """
-    if not validators.url(url):
+    if not validators.url(url, simple_host=True):
         return False, "Invalid URL format"
     
-    wiki_domains = ["wikipedia.org", "en.wikipedia.org", "vi.wikipedia.org", "de.wikipedia.org"]
-    if not any(domain in url.lower() for domain in wiki_domains):
+    host = (urlparse(url).hostname or "").lower()
+    domains = allowed_domains or WIKI_DOMAINS
+    if not any(host == domain or host.endswith("." + domain) for domain in domains):
         return False, "Not a Wikipedia URL"
     return True, url
 
 
-def fetch_content(url):
+def create_session(pool_size: int = 16, retries: int = 3, backoff_factor: float = 0.5) -> requests.Session:
+    """
+    Shared HTTP session: keep-alive connection pool sized for the crawler
+    threads, with retries and exponential backoff on connection errors,
+    429 and 5xx responses (``Retry-After`` is honoured).
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+class HostRateLimiter:
+    """
+    Spaces requests to the same host at least ``1 / requests_per_second``
+    seconds apart. Each caller reserves the next free slot under the lock
+    and sleeps outside it, so different hosts never wait on each other.
+    """
+
+    def __init__(self, requests_per_second: float = 1.0):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = {}
+
+    def wait(self, url: str):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def parse_wiki_html(html: str) -> dict:
+    # Parse HTML với BeautifulSoup (lxml nếu có, nhanh hơn html.parser)
+    return extract_wiki_content(BeautifulSoup(html, HTML_PARSER))
+
+
+def extract_wiki_content(soup: BeautifulSoup) -> dict:
     try:
-        # Gửi request đến URL
-        response = requests.get(url)
-        response.raise_for_status()  # Kiểm tra lỗi HTTP
-        
-        # Parse HTML với BeautifulSoup
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
         # Lấy tiêu đề
         title = soup.find('h1', {'id': 'firstHeading'}).text
         
@@ -64,6 +128,48 @@ def fetch_content(url):
             'status': 'error',
             'message': str(e)
         }
+
+
+def extract_wiki_links(soup: BeautifulSoup, page_url: str) -> List[str]:
+    """
+    In-domain article links of the main content of a wiki page
+    
+    Args:
+        soup (BeautifulSoup): Parsed page
+        page_url (str): URL of the page, used to resolve relative links
+        
+    Returns:
+        List[str]: Absolute ``/wiki/`` URLs on the same host, without
+        fragments, namespace pages (``File:``, ``Thể_loại:``...) or red links
+    """
+    content_div = soup.find('div', {'id': 'mw-content-text'})
+    if content_div is None:
+        return []
+    host = urlparse(page_url).netloc
+    links = []
+    for a in content_div.find_all('a', href=True):
+        url, _ = urldefrag(urljoin(page_url, a['href']))
+        parts = urlparse(url)
+        if parts.netloc != host or parts.query or not parts.path.startswith('/wiki/'):
+            continue
+        title = unquote(parts.path[len('/wiki/'):])
+        if not title or ':' in title:
+            continue
+        links.append(url)
+    return list(dict.fromkeys(links))
+
+
+def fetch_content(url, session: Optional[requests.Session] = None, timeout: float = 10):
+    try:
+        # Gửi request đến URL
+        response = (session or requests).get(url, timeout=timeout)
+        response.raise_for_status()  # Kiểm tra lỗi HTTP
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
+    return parse_wiki_html(response.text)
         
 
 stop_words = set([
@@ -102,7 +208,21 @@ def process_wikipedia_url(url: str) -> dict:
     if not raw_content:
         return {"status": "error", "message": "Failed to fetch content"}
     
+    return process_raw_content(raw_content)
+
+
+def process_raw_content(raw_content: dict) -> dict:
+    """
+    Clean the paragraphs of a fetched page (steps 5-7 of the pipeline)
     
+    Args:
+        raw_content (dict): Output of ``parse_wiki_html``
+        
+    Returns:
+        dict: Processing results and status
+    """
+    if raw_content.get('status') != 'success':
+        return {"status": "error", "message": raw_content.get('message', "Failed to fetch content")}
     
     # Step 5: Process text (trả về list)
    
@@ -117,31 +237,331 @@ def process_wikipedia_url(url: str) -> dict:
         "processed_text": processed_list
     }
 
-def crawl_urls_from_file(file_path: str, save_folder: str):
-    os.makedirs(save_folder, exist_ok=True)
+def process_wiki_html(html: str, url: Optional[str] = None) -> Tuple[dict, List[str]]:
+    """
+    Parse and clean one page; runs in the crawler's parse worker pool.
+    
+    Returns:
+        Tuple[dict, List[str]]: (processing result, in-domain links when ``url`` is given)
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+    links = extract_wiki_links(soup, url) if url else []
+    return process_raw_content(extract_wiki_content(soup)), links
+
+
+def output_filename(title: str) -> str:
+    # Tạo tên file từ title
+    filename = re.sub(r'[^\w\s]', '', title)
+    return re.sub(r'\s+', '_', filename) + ".json"
+
+
+class URLSeenSet:
+    """
+    Exact set of visited URLs stored as 64-bit fingerprints of the
+    normalized URL (scheme and host lower-cased, path percent-decoded,
+    fragment dropped), so ``%C4%90`` and ``Đ`` spellings of a link collide
+    and memory stays a fixed few dozen bytes per URL however long it is.
+    """
+
+    def __init__(self, fingerprints=()):
+        self.fingerprints = set(fingerprints)
+
+    @staticmethod
+    def normalize(url: str) -> str:
+        url, _ = urldefrag(url)
+        parts = urlparse(url)
+        normalized = f"{parts.scheme.lower()}://{parts.netloc.lower()}{unquote(parts.path)}"
+        return normalized + (f"?{parts.query}" if parts.query else "")
+
+    @classmethod
+    def fingerprint(cls, url: str) -> int:
+        digest = hashlib.blake2b(cls.normalize(url).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
+    def add(self, url: str) -> bool:
+        """Add ``url``; returns False if it was already seen."""
+        fingerprint = self.fingerprint(url)
+        if fingerprint in self.fingerprints:
+            return False
+        self.fingerprints.add(fingerprint)
+        return True
+
+    def __contains__(self, url):
+        return self.fingerprint(url) in self.fingerprints
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+
+class WikiCrawler:
+    """
+    Concurrent, polite crawler for wiki pages.
+
+    ``workers`` threads fetch pages through one pooled ``requests.Session``
+    (retries with backoff), never hitting a host more often than
+    ``requests_per_second``. HTML is parsed and cleaned on a process pool of
+    ``parse_workers`` so BeautifulSoup does not serialize on the GIL.
+
+    ETag / Last-Modified of every saved page are kept in ``cache_path``
+    (``<save_folder>/http_cache.json`` by default); re-crawls send
+    conditional GETs and skip pages the server reports unchanged (304).
+
+    ``allowed_domains`` replaces the Wikipedia host check, e.g.
+    ``["127.0.0.1"]`` to crawl saved wiki HTML from a local HTTP server.
+
+    ``crawl`` visits a fixed list of URLs; ``crawl_frontier`` starts from
+    seed URLs and follows in-domain links breadth-first.
+    """
+
+    def __init__(self, save_folder: str, workers: int = 8, parse_workers: Optional[int] = None,
+                 requests_per_second: float = 1.0, timeout: float = 10, retries: int = 3,
+                 backoff_factor: float = 0.5, allowed_domains: Optional[List[str]] = None,
+                 cache_path: Optional[str] = None):
+        self.save_folder = save_folder
+        self.workers = workers
+        self.parse_workers = parse_workers
+        self.timeout = timeout
+        self.allowed_domains = allowed_domains
+        self.session = create_session(pool_size=workers, retries=retries, backoff_factor=backoff_factor)
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+        self.cache_path = cache_path or os.path.join(save_folder, "http_cache.json")
+        self.cache_lock = threading.Lock()
+        self.http_cache = {}
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                self.http_cache = json.load(f)
+
+    def save_cache(self):
+        with self.cache_lock:
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.http_cache, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.cache_path)
+
+    def fetch(self, url: str):
+        """
+        Conditional GET of ``url``.
+
+        Returns:
+            Tuple[str, Optional[requests.Response]]: ``("unchanged", None)``
+            on 304 when the saved file is still there, else ``("fetched", response)``
+        """
+        headers = {}
+        with self.cache_lock:
+            entry = self.http_cache.get(url)
+        if entry and os.path.exists(os.path.join(self.save_folder, entry["file"])):
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        self.rate_limiter.wait(url)
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and headers:
+            return "unchanged", None
+        response.raise_for_status()
+        return "fetched", response
+
+    def _save(self, url: str, response: requests.Response, result: dict, links: List[str]) -> str:
+        filename = output_filename(result['raw_content']['title'])
+        save_path = os.path.join(self.save_folder, filename)
+        with open(save_path, 'w', encoding='utf-8') as f_json:
+            json.dump(result, f_json, ensure_ascii=False, indent=2)
+        with self.cache_lock:
+            self.http_cache[url] = {
+                "file": filename,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                # Kept so a 304 page can still expand the crawl frontier
+                "links": links,
+            }
+        return save_path
+
+    def _crawl_one(self, url: str, parse_pool: ProcessPoolExecutor) -> Tuple[str, List[str]]:
+        is_valid, message = validate_wiki_url(url, self.allowed_domains)
+        if not is_valid:
+            print(f"Lỗi: {message} ({url})")
+            return "error", []
+        status, response = self.fetch(url)
+        if status == "unchanged":
+            print(f"Không thay đổi: {url}")
+            with self.cache_lock:
+                return status, self.http_cache[url].get("links", [])
+        result, links = parse_pool.submit(process_wiki_html, response.text, response.url).result()
+        if result['status'] != 'success':
+            print(f"Lỗi: {result['message']} ({url})")
+            return "error", []
+        print(f"Đã lưu: {self._save(url, response, result, links)}")
+        return "saved", links
+
+    def crawl(self, urls: List[str]) -> dict:
+        """
+        Crawl ``urls`` concurrently and save one JSON file per page.
+
+        Returns:
+            dict: Number of ``saved``, ``unchanged`` and ``error`` pages and ``wall_seconds``
+        """
+        os.makedirs(self.save_folder, exist_ok=True)
+        stats = {"saved": 0, "unchanged": 0, "error": 0}
+        start = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(max_workers=self.parse_workers) as parse_pool, \
+                    ThreadPoolExecutor(max_workers=self.workers) as fetch_pool:
+                futures = {fetch_pool.submit(self._crawl_one, url, parse_pool): url for url in urls}
+                for future in as_completed(futures):
+                    try:
+                        stats[future.result()[0]] += 1
+                    except Exception as e:
+                        print(f"Lỗi không mong muốn với URL {futures[future]}: {e}")
+                        stats["error"] += 1
+        finally:
+            self.save_cache()
+        stats["wall_seconds"] = time.perf_counter() - start
+        return stats
+
+
+    @staticmethod
+    def _load_frontier(checkpoint_path: str):
+        if not os.path.exists(checkpoint_path):
+            return deque(), URLSeenSet(), 0
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        queue = deque((url, depth) for url, depth in checkpoint["queue"])
+        seen = URLSeenSet(int(fingerprint, 16) for fingerprint in checkpoint["seen"])
+        print(f"Tiếp tục crawl: {len(queue)} URL trong hàng đợi, {checkpoint['pages']} trang đã xử lý")
+        return queue, seen, checkpoint["pages"]
+
+    @staticmethod
+    def _save_frontier(checkpoint_path: str, queue, seen: URLSeenSet, pages: int):
+        tmp_path = checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "pages": pages,
+                    "queue": [[url, depth] for url, depth in queue],
+                    "seen": [format(fingerprint, "016x") for fingerprint in seen.fingerprints],
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, checkpoint_path)
+
+    def crawl_frontier(self, seeds: List[str], max_depth: int = 2, max_pages: int = 1000,
+                       checkpoint_path: Optional[str] = None, checkpoint_every: int = 50) -> dict:
+        """
+        Breadth-first crawl from ``seeds`` following in-domain wiki links.
+
+        The queue, the seen-URL fingerprints and the page count are written
+        to ``checkpoint_path`` (``<save_folder>/frontier.json`` by default)
+        every ``checkpoint_every`` pages and when the crawl stops, including
+        on Ctrl+C; a later call with the same checkpoint resumes from there.
+        Pages still in flight when the crawl stopped are queued again.
+
+        Args:
+            seeds (List[str]): Start URLs (depth 0); already seen ones are ignored
+            max_depth (int): Links are followed up to this many hops from a seed
+            max_pages (int): Stop after this many pages saved or unchanged, over all resumed runs
+
+        Returns:
+            dict: Same counters as ``crawl`` plus ``pages`` and ``queued``
+        """
+        os.makedirs(self.save_folder, exist_ok=True)
+        checkpoint_path = checkpoint_path or os.path.join(self.save_folder, "frontier.json")
+        queue, seen, pages = self._load_frontier(checkpoint_path)
+        for url in seeds:
+            if seen.add(url):
+                queue.append((url, 0))
+
+        stats = {"saved": 0, "unchanged": 0, "error": 0}
+        in_flight = {}
+        since_checkpoint = 0
+        start = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(max_workers=self.parse_workers) as parse_pool, \
+                    ThreadPoolExecutor(max_workers=self.workers) as fetch_pool:
+                while queue or in_flight:
+                    while queue and len(in_flight) < self.workers and pages + len(in_flight) < max_pages:
+                        url, depth = queue.popleft()
+                        in_flight[fetch_pool.submit(self._crawl_one, url, parse_pool)] = (url, depth)
+                    if not in_flight:
+                        break
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        url, depth = in_flight.pop(future)
+                        try:
+                            status, links = future.result()
+                        except Exception as e:
+                            print(f"Lỗi không mong muốn với URL {url}: {e}")
+                            status, links = "error", []
+                        stats[status] += 1
+                        if status != "error":
+                            pages += 1
+                        if depth < max_depth:
+                            queue.extend((link, depth + 1) for link in links if seen.add(link))
+                        since_checkpoint += 1
+                    if since_checkpoint >= checkpoint_every:
+                        self._save_frontier(checkpoint_path, list(in_flight.values()) + list(queue), seen, pages)
+                        self.save_cache()
+                        since_checkpoint = 0
+        finally:
+            self._save_frontier(checkpoint_path, list(in_flight.values()) + list(queue), seen, pages)
+            self.save_cache()
+        stats["pages"] = pages
+        stats["queued"] = len(queue)
+        stats["wall_seconds"] = time.perf_counter() - start
+        return stats
+
+
+def crawl_urls_from_file(file_path: str, save_folder: str, frontier: bool = False, max_depth: int = 2,
+                         max_pages: int = 1000, **crawler_options):
+    """
+    Crawl the URLs listed in ``file_path``, or with ``frontier=True`` use
+    them as seeds of a resumable breadth-first crawl (see ``WikiCrawler.crawl_frontier``).
+    """
     with open(file_path, "r", encoding="utf-8") as f:
         urls = [line.strip() for line in f if line.strip() and not line.startswith("//")]
 
-    for url in urls:
-        print(f"Đang xử lý: {url}")
-        try:
-            result = process_wikipedia_url(url)
-            if result['status'] == 'success':
-                # Tạo tên file từ title
-                filename = re.sub(r'[^\w\s]', '', result['raw_content']['title'])
-                filename = re.sub(r'\s+', '_', filename) + ".json"
-                save_path = os.path.join(save_folder, filename)
-                with open(save_path, 'w', encoding='utf-8') as f_json:
-                    json.dump(result, f_json, ensure_ascii=False, indent=2)
-                print(f"Đã lưu: {save_path}")
-            else:
-                print(f"Lỗi: {result['message']}")
-        except Exception as e:
-            print(f"Lỗi không mong muốn với URL {url}: {e}")  
+    crawler = WikiCrawler(save_folder, **crawler_options)
+    if frontier:
+        stats = crawler.crawl_frontier(urls, max_depth=max_depth, max_pages=max_pages)
+        print(f"Hàng đợi còn {stats['queued']} URL, tổng {stats['pages']} trang")
+    else:
+        stats = crawler.crawl(urls)
+    print(
+        f"Hoàn thành: {stats['saved']} đã lưu, {stats['unchanged']} không thay đổi, "
+        f"{stats['error']} lỗi trong {stats['wall_seconds']:.1f}s"
+    )
+    return stats
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl wiki pages listed in a file")
+    parser.add_argument("--urls", default="wiki_source/wiki_urls.txt", help="File with one URL per line")
+    parser.add_argument("--out", default="data_crawl", help="Folder for the crawled JSON files")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent fetches")
+    parser.add_argument("--parse_workers", type=int, default=None, help="Parse processes (default: CPU count)")
+    parser.add_argument("--rate", type=float, default=1.0, help="Max requests per second per host (0 = unlimited)")
+    parser.add_argument("--timeout", type=float, default=10, help="Request timeout in seconds")
+    parser.add_argument("--retries", type=int, default=3, help="Retries on connection errors, 429 and 5xx")
+    parser.add_argument("--allow_host", action="append", default=None,
+                        help="Accept this host instead of Wikipedia (repeatable), e.g. 127.0.0.1")
+    parser.add_argument("--frontier", action="store_true",
+                        help="Use the URLs as seeds and follow in-domain links (resumes from <out>/frontier.json)")
+    parser.add_argument("--max_depth", type=int, default=2, help="Link hops from a seed in --frontier mode")
+    parser.add_argument("--max_pages", type=int, default=1000, help="Page limit in --frontier mode")
+    args = parser.parse_args()
 
-    crawl_urls_from_file("wiki_source/wiki_urls.txt", "data_crawl")
+    crawl_urls_from_file(
+        args.urls,
+        args.out,
+        frontier=args.frontier,
+        max_depth=args.max_depth,
+        max_pages=args.max_pages,
+        workers=args.workers,
+        parse_workers=args.parse_workers,
+        requests_per_second=args.rate,
+        timeout=args.timeout,
+        retries=args.retries,
+        allowed_domains=args.allow_host,
+    )
    
     
 
@@ -0,0 +1,170 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Persistent, size-bounded LRU cache of embeddings.
+
+    Layout of ``path``:
+        vectors.f32 - memory-mapped float32 matrix, one row per slot
+        index.npz   - 16-byte key and last-access tick of every slot
+        meta.json   - dimension, capacity and the access clock
+
+    A tick of 0 marks an empty slot. When the cache is full the oldest
+    ``evict_fraction`` of the slots are freed at once and the index is saved
+    before any freed slot is overwritten, so a crash never maps a key to
+    another key's vector.
+    """
+
+    def __init__(self, path, max_entries=100_000, evict_fraction=0.05):
+        self.path = path
+        self.max_entries = max_entries
+        self.evict_count = max(1, int(max_entries * evict_fraction))
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.dimension = None
+        self.vectors = None
+        self.clock = 0
+        self.keys = np.zeros((max_entries, 16), dtype=np.uint8)
+        self.ticks = np.zeros(max_entries, dtype=np.uint64)
+        self.slots = {}
+        self.free = list(range(max_entries - 1, -1, -1))
+        self._dirty = False
+
+        os.makedirs(path, exist_ok=True)
+        self._load()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(model_name, text):
+        return hashlib.blake2b(
+            f"{model_name}\0{text}".encode("utf-8"), digest_size=16
+        ).digest()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        if not os.path.exists(self._file("meta.json")):
+            return
+        with open(self._file("meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["max_entries"] != self.max_entries:
+            print(
+                f"Embedding cache at {self.path} was built with "
+                f"{meta['max_entries']} entries, resetting it."
+            )
+            return
+        index = np.load(self._file("index.npz"))
+        self.keys[:] = index["keys"]
+        self.ticks[:] = index["ticks"]
+        self.clock = meta["clock"]
+        self._open_vectors(meta["dimension"])
+        used = np.flatnonzero(self.ticks)
+        self.slots = {self.keys[slot].tobytes(): int(slot) for slot in used}
+        self.free = [int(slot) for slot in np.flatnonzero(self.ticks == 0)[::-1]]
+
+    def _open_vectors(self, dimension):
+        self.dimension = dimension
+        size = self.max_entries * dimension * np.dtype(np.float32).itemsize
+        with open(self._file("vectors.f32"), "ab") as f:
+            f.truncate(size)
+        self.vectors = np.memmap(
+            self._file("vectors.f32"),
+            dtype=np.float32,
+            mode="r+",
+            shape=(self.max_entries, dimension),
+        )
+
+    def __len__(self):
+        return len(self.slots)
+
+    def get_many(self, keys):
+        """
+        :param keys: Keys built with ``make_key``.
+        :return: List with a vector (or None on a miss) per key.
+        """
+        results = []
+        with self.lock:
+            for key in keys:
+                slot = self.slots.get(key)
+                if slot is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                self.hits += 1
+                self.clock += 1
+                self.ticks[slot] = self.clock
+                self._dirty = True
+                results.append(np.array(self.vectors[slot]))
+        return results
+
+    def put_many(self, keys, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(keys) == 0:
+            return
+        with self.lock:
+            if self.vectors is None:
+                self._open_vectors(vectors.shape[1])
+            # Inserting more than the capacity only keeps the most recent rows
+            keys, vectors = keys[-self.max_entries:], vectors[-self.max_entries:]
+            for key, vector in zip(keys, vectors):
+                self.clock += 1
+                slot = self.slots.get(key)
+                if slot is None:
+                    if not self.free:
+                        self._evict(protect=keys)
+                    slot = self.free.pop()
+                    self.keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                    self.slots[key] = slot
+                self.vectors[slot] = vector
+                self.ticks[slot] = self.clock
+            self._dirty = True
+
+    def _evict(self, protect=()):
+        # Never evict entries written earlier in the same batch
+        protected = [self.slots[key] for key in protect if key in self.slots]
+        if len(protected) >= len(self.slots):
+            protected = []
+        ticks = self.ticks.copy()
+        ticks[protected] = np.iinfo(np.uint64).max
+        count = min(self.evict_count, len(self.slots) - len(protected))
+        oldest = np.argpartition(ticks, count - 1)[:count]
+        for slot in oldest:
+            del self.slots[self.keys[slot].tobytes()]
+            self.ticks[slot] = 0
+            self.keys[slot] = 0
+            self.free.append(int(slot))
+        self._save_index()
+
+    def _save_index(self):
+        tmp_path = self._file("index.tmp.npz")
+        np.savez(tmp_path, keys=self.keys, ticks=self.ticks)
+        os.replace(tmp_path, self._file("index.npz"))
+        with open(self._file("meta.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "dimension": self.dimension,
+                    "max_entries": self.max_entries,
+                    "clock": self.clock,
+                },
+                f,
+            )
+
+    def flush(self):
+        with self.lock:
+            if self.vectors is None or not self._dirty:
+                return
+            self.vectors.flush()
+            self._save_index()
+            self._dirty = False
+
+    def stats(self):
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
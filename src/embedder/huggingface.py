@@ -1,22 +1,88 @@
-from sentence_transformers import SentenceTransformer
-import torch
-from pyvi.ViTokenizer import tokenize
+import threading
+import time
+
+import numpy as np
+
+from embedder.segmentation import Segmenter
 
 class HuggingFaceEmbedder:
-    def __init__(self, model_name):
-        self.model = SentenceTransformer(
-            model_name,
-            device="cuda" if torch.cuda.is_available() else "cpu",
-        )
+    def __init__(self, model_name, cache=None, segmenter=None):
+        """
+        :param model_name: SentenceTransformer model name.
+        :param cache: Optional ``EmbeddingCache``; cached texts skip the model.
+        :param segmenter: ``Segmenter`` for pyvi word segmentation, a default one if None.
+        """
+        self.model_name = model_name
+        self.cache = cache
+        self.segmenter = segmenter or Segmenter()
+        self._model = None
+        self.model_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.load_seconds = 0.0
+        self.segment_seconds = 0.0
+        self.model_seconds = 0.0
+        self.num_texts = 0
+
+    @property
+    def model(self):
+        # Loaded on first encode: commands that never embed skip torch and the weights
+        if self._model is None:
+            with self.model_lock:
+                if self._model is None:
+                    start = time.perf_counter()
+                    from sentence_transformers import SentenceTransformer
+                    import torch
+                    self._model = SentenceTransformer(
+                        self.model_name,
+                        device="cuda" if torch.cuda.is_available() else "cpu",
+                    )
+                    self.load_seconds = time.perf_counter() - start
+        return self._model
+
+    def _encode_model(self, texts, batch_size=None):
+        model = self.model
+        start = time.perf_counter()
+        if batch_size is None:
+            embeddings = model.encode(texts)
+        else:
+            embeddings = model.encode(texts, batch_size=batch_size)
+        with self.stats_lock:
+            self.model_seconds += time.perf_counter() - start
+        return embeddings
     
-    def encode(self, texts):
+    def encode(self, texts, batch_size=None):
         """
         Encode a list of texts into embeddings.
 
         :param texts: List of texts to encode.
+        :param batch_size: Texts per model forward pass (model default if None).
+            The whole list is segmented in one ``Segmenter`` call either way,
+            so bulk calls can use its process pool.
         :return: List of embeddings.
         """
-        texts = [
-            str(tokenize(text)) if isinstance(text, str) else text for text in texts
-        ]
-        return self.model.encode(texts)
\ No newline at end of file
+        start = time.perf_counter()
+        texts = self.segmenter.segment(list(texts))
+        with self.stats_lock:
+            self.segment_seconds += time.perf_counter() - start
+            self.num_texts += len(texts)
+        if self.cache is None or not texts:
+            return self._encode_model(texts, batch_size)
+
+        keys = [self.cache.make_key(self.model_name, str(text)) for text in texts]
+        embeddings = self.cache.get_many(keys)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            computed = self._encode_model([texts[i] for i in missing], batch_size)
+            self.cache.put_many([keys[i] for i in missing], computed)
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+        return np.stack(embeddings)
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "texts": self.num_texts,
+                "load_seconds": self.load_seconds,
+                "segment_seconds": self.segment_seconds,
+                "model_seconds": self.model_seconds,
+            }
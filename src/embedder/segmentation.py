@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+
+def segment_texts(texts):
+    # pyvi loads its CRF model on import, only pay for it once text is segmented
+    from pyvi.ViTokenizer import tokenize
+    return [str(tokenize(text)) for text in texts]
+
+
+class Segmenter:
+    """
+    Vietnamese word segmentation (pyvi) with a bounded LRU memo.
+
+    Calls with at least ``parallel_threshold`` unseen texts, or at least
+    ``parallel_min_chars`` characters of them (a file's few long chunks during
+    ingestion), are split across a process pool of ``workers`` processes
+    (created on first use); smaller calls, such as single queries, stay
+    in-process. ``workers=0`` disables the pool.
+    """
+
+    def __init__(self, memo_size=4096, workers=None, parallel_threshold=64, parallel_min_chars=8000):
+        self.memo_size = memo_size
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.parallel_threshold = parallel_threshold
+        self.parallel_min_chars = parallel_min_chars
+        self.memo = OrderedDict()
+        self.lock = threading.Lock()
+        self.pool = None
+        self.inline_texts = 0
+        self.parallel_texts = 0
+        self.parallel_calls = 0
+
+    def _use_pool(self, texts):
+        if self.workers <= 1:
+            return False
+        return (
+            len(texts) >= self.parallel_threshold
+            or sum(len(text) for text in texts) >= self.parallel_min_chars
+        )
+
+    def _segment_missing(self, texts):
+        if self._use_pool(texts):
+            with self.lock:
+                if self.pool is None:
+                    # Callers run on several threads (ingestion pipeline, engine
+                    # executors); forking such a process can deadlock the children
+                    self.pool = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                pool = self.pool
+                self.parallel_calls += 1
+                self.parallel_texts += len(texts)
+            chunk_size = max(1, len(texts) // (self.workers * 4))
+            chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+            return [text for chunk in pool.map(segment_texts, chunks) for text in chunk]
+        with self.lock:
+            self.inline_texts += len(texts)
+        return segment_texts(texts)
+
+    def segment(self, texts):
+        """
+        :param texts: List of texts; non-string items are returned unchanged.
+        :return: List of segmented texts.
+        """
+        results = {}
+        with self.lock:
+            for text in texts:
+                if isinstance(text, str) and text in self.memo:
+                    self.memo.move_to_end(text)
+                    results[text] = self.memo[text]
+        missing = list(dict.fromkeys(
+            text for text in texts if isinstance(text, str) and text not in results
+        ))
+        if missing:
+            segmented = self._segment_missing(missing)
+            results.update(zip(missing, segmented))
+            with self.lock:
+                for text, value in zip(missing, segmented):
+                    self.memo[text] = value
+                while len(self.memo) > self.memo_size:
+                    self.memo.popitem(last=False)
+        return [results[text] if isinstance(text, str) else text for text in texts]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "inline_texts": self.inline_texts,
+                "parallel_texts": self.parallel_texts,
+                "parallel_calls": self.parallel_calls,
+            }
+
+    def close(self):
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown()
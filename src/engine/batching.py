@@ -0,0 +1,91 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+class MicroBatchEmbedder:
+    """
+    Wraps an embedder so that concurrent ``encode`` calls from different
+    threads are merged into one model call.
+
+    A background thread takes the first waiting request, then keeps collecting
+    requests until ``max_batch_size`` texts are gathered or ``max_wait_ms``
+    has passed, encodes them together and hands every caller its rows back.
+    Any other attribute is forwarded to the wrapped embedder.
+    """
+
+    def __init__(self, embedder, max_batch_size=16, max_wait_ms=5):
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.stats_lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.queue_depths = Counter()
+        self.max_queue_depth = 0
+        self.worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self.worker.start()
+
+    def __getattr__(self, name):
+        return getattr(self.embedder, name)
+
+    def encode(self, texts, batch_size=None):
+        texts = list(texts)
+        if not texts or batch_size is not None:
+            # Bulk encodes (ingestion) are already batched, pass them through
+            return self.embedder.encode(texts, batch_size=batch_size)
+        future = Future()
+        self.requests.put((texts, future))
+        return future.result()
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch, size
+
+    def _run(self):
+        while True:
+            batch, size = self._collect()
+            depth = self.requests.qsize()
+            with self.stats_lock:
+                self.batch_sizes[size] += 1
+                self.queue_depths[depth] += 1
+                self.max_queue_depth = max(self.max_queue_depth, depth)
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                embeddings = self.embedder.encode(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for request_texts, future in batch:
+                future.set_result(embeddings[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+    def stats(self):
+        with self.stats_lock:
+            batches = sum(self.batch_sizes.values())
+            texts = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                "queue_depth": self.requests.qsize(),
+                "max_queue_depth": self.max_queue_depth,
+                "batches": batches,
+                "avg_batch_size": texts / batches if batches else 0.0,
+                "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+                "queue_depth_histogram": dict(sorted(self.queue_depths.items())),
+            }
@@ -1,15 +1,159 @@
+import asyncio
+import contextvars
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List
+
 from generator.prompt import PROMPT_TEMPLATE
+from engine.cache import TTLCache
+from engine.tracing import get_tracer
+
+# Distinguishes the cache gauges of engines living in the same process
+_engine_ids = itertools.count(1)
+
+
+@dataclass
+class RAGResult:
+    """Answer to one question together with the chunks it was generated from."""
+    question: str
+    answer: str
+    # Texts of the chunks in the prompt, in prompt order
+    contexts: List[str] = field(default_factory=list)
+    # Matches the contexts come from (ids, scores, metadata)
+    matches: List = field(default_factory=list)
+    # Seconds spent per stage ("retrieve", "prompt", "generate"), set by ``query``
+    timings: Dict[str, float] = field(default_factory=dict)
+
 
 class RAGEngine:
-    def __init__(self, indexer, generator):
+    def __init__(self, indexer, generator, cache_size=1024, cache_ttl=600, reranker=None):
+        """
+        :param indexer: Vector index (``PineconeIndex`` or ``LocalIndex``).
+        :param generator: LLM generator.
+        :param cache_size: Max entries of the query embedding / retrieval caches, 0 disables them.
+        :param cache_ttl: Seconds before a cached entry expires.
+        :param reranker: Optional ``CrossEncoderReranker``; when set, ``reranker.candidates``
+            chunks are retrieved and only the best ones reach the prompt.
+        """
         self.indexer = indexer
         self.generator = generator
+        self.reranker = reranker
+        self.embedding_cache = TTLCache(cache_size, cache_ttl)
+        self.retrieval_cache = TTLCache(cache_size, cache_ttl)
+        self.index_version = getattr(indexer, "version", None)
+        # Single worker: concurrent requests queue up instead of fighting
+        # over the model's own intra-op threads
+        self.encode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encode")
+        self.last_stream_stats = None
+        self.engine_id = str(next(_engine_ids))
+        # Held weakly by the tracer: dropped once the engine goes away
+        get_tracer().add_collector(self._cache_metrics)
+
+    def _cache_metrics(self):
+        for cache, stats in self.cache_stats().items():
+            labels = {"cache": cache, "engine": self.engine_id}
+            yield "rag_cache_hit_rate", labels, stats["hit_rate"]
+            yield "rag_cache_size", labels, stats["size"]
+
+    def embed_query(self, query):
+        return self.embed_queries([query])[0]
+
+    def embed_queries(self, queries):
+        """Embed queries with a single encoder call for all cache misses."""
+        embeddings = {query: self.embedding_cache.get(query) for query in dict.fromkeys(queries)}
+        missing = [query for query, embedding in embeddings.items() if embedding is None]
+        if missing:
+            with get_tracer().span("embed", texts=len(missing)):
+                encoded = self.indexer.embedding_model.encode(missing)
+            for query, embedding in zip(missing, encoded):
+                embeddings[query] = embedding
+                self.embedding_cache.set(query, embedding)
+        return [embeddings[query] for query in queries]
+
+    def _check_index_version(self):
+        # Drop cached results as soon as the index has been written to
+        version = getattr(self.indexer, "version", None)
+        if version != self.index_version:
+            self.retrieval_cache.clear()
+            self.index_version = version
+
+    def retrieve(self, query, top_k=5):
+        return self.retrieve_many([query], top_k)[0]
+
+    def retrieve_many(self, queries, top_k=5):
+        self._check_index_version()
+        results = {
+            query: self.retrieval_cache.get((query, top_k)) for query in dict.fromkeys(queries)
+        }
+        missing = [query for query, result in results.items() if result is None]
+        if missing:
+            vectors = self.embed_queries(missing)
+            with get_tracer().span("search", queries=len(missing), top_k=top_k):
+                all_results = self.indexer.hybrid_query_many(vectors, missing, top_k)
+            for query, search_results in zip(missing, all_results):
+                results[query] = search_results
+                self.retrieval_cache.set((query, top_k), search_results)
+        return [results[query] for query in queries]
+
+    async def aembed_query(self, query):
+        embedding = self.embedding_cache.get(query)
+        if embedding is None:
+            loop = asyncio.get_running_loop()
+            with get_tracer().span("embed", texts=1):
+                embeddings = await loop.run_in_executor(
+                    self.encode_executor, self.indexer.embedding_model.encode, [query]
+                )
+            embedding = embeddings[0]
+            self.embedding_cache.set(query, embedding)
+        return embedding
+
+    async def aretrieve(self, query, top_k=5):
+        self._check_index_version()
+        search_results = self.retrieval_cache.get((query, top_k))
+        if search_results is None:
+            vector = await self.aembed_query(query)
+            with get_tracer().span("search", queries=1, top_k=top_k):
+                search_results = await self.indexer.ahybrid_query(vector, query, top_k)
+            self.retrieval_cache.set((query, top_k), search_results)
+        return search_results
+
+    def retrieve_ranked(self, query, top_k=5):
+        return self.retrieve_ranked_many([query], top_k)[0]
+
+    def retrieve_ranked_many(self, queries, top_k=5):
+        """
+        Chunks that go into the prompt: the top ``top_k`` of the index, or,
+        with a reranker, the best ``min(top_k, reranker.top_n)`` of
+        ``reranker.candidates`` retrieved chunks.
+        """
+        if self.reranker is None:
+            return self.retrieve_many(queries, top_k)
+        candidates = self.retrieve_many(queries, max(top_k, self.reranker.candidates))
+        with get_tracer().span("rerank", queries=len(queries)):
+            return [
+                self.reranker.rerank(query, search_results, min(top_k, self.reranker.top_n))
+                for query, search_results in zip(queries, candidates)
+            ]
+
+    async def aretrieve_ranked(self, query, top_k=5):
+        if self.reranker is None:
+            return await self.aretrieve(query, top_k)
+        candidates = await self.aretrieve(query, max(top_k, self.reranker.candidates))
+        with get_tracer().span("rerank", queries=1):
+            return await asyncio.to_thread(
+                self.reranker.rerank, query, candidates, min(top_k, self.reranker.top_n)
+            )
+
+    def cache_stats(self):
+        return {
+            "query_embedding": self.embedding_cache.stats(),
+            "retrieval": self.retrieval_cache.stats(),
+        }
 
-    def generate_answer(self, query, top_k=5):
-        # Search for relevant documents
-        search_results = self.indexer.search(query, top_k)
-        
-        # Extract text from search results
+    @staticmethod
+    def extract_contexts(search_results):
         context_texts = []
         if hasattr(search_results, 'matches') and search_results.matches:
             for match in search_results.matches:
@@ -17,11 +161,164 @@ class RAGEngine:
                     text = match.metadata.get('text', '')
                     if text:
                         context_texts.append(str(text))
-        
-        # Join context texts
+        return context_texts
+
+    def build_prompt(self, query, search_results):
+        context_texts = self.extract_contexts(search_results)
         context = "\n".join(context_texts) if context_texts else "No relevant context found."
-        
-        # Generate answer using the generator
-        prompt = PROMPT_TEMPLATE.format(question=query, context=context)
-        answer = self.generator.generate(prompt)
-        return answer
\ No newline at end of file
+        return PROMPT_TEMPLATE.format(question=query, context=context)
+
+    @classmethod
+    def make_result(cls, query, answer, search_results):
+        return RAGResult(
+            question=query,
+            answer=answer,
+            contexts=cls.extract_contexts(search_results),
+            matches=list(getattr(search_results, "matches", None) or []),
+        )
+
+    @staticmethod
+    def _record_result(tracer, span, result):
+        span.set("chunks", len(result.contexts))
+        span.set("answer_chars", len(result.answer))
+        tracer.count("rag_queries_total")
+        tracer.count("rag_retrieved_chunks_total", len(result.contexts))
+
+    def query(self, query, top_k=5, use_history=True):
+        """
+        Retrieve, build the prompt and generate.
+
+        :return: ``RAGResult`` with the answer and the retrieved contexts, so
+            callers (e.g. the evaluator) need no second search.
+        """
+        tracer = get_tracer()
+        with tracer.span("query", top_k=top_k, **tracer.query_attributes(query)) as span:
+            start = time.perf_counter()
+            # Search for relevant documents
+            search_results = self.retrieve_ranked(query, top_k)
+            retrieved = time.perf_counter()
+
+            # Generate answer using the generator; without history the call is
+            # independent of (and safe to run alongside) other requests
+            prompt = self.build_prompt(query, search_results)
+            prompted = time.perf_counter()
+            with tracer.span("generate", prompt_chars=len(prompt)):
+                if use_history:
+                    answer = self.generator.generate(prompt)
+                else:
+                    answer = self.generator.complete(prompt)
+            result = self.make_result(query, answer, search_results)
+            result.timings = {
+                "retrieve": retrieved - start,
+                "prompt": prompted - retrieved,
+                "generate": time.perf_counter() - prompted,
+            }
+            self._record_result(tracer, span, result)
+        return result
+
+    def generate_answer(self, query, top_k=5, use_history=True):
+        return self.query(query, top_k, use_history).answer
+
+    def stream_answer(self, query, top_k=5):
+        """
+        Same as ``generate_answer`` but yields the answer tokens as the LLM
+        produces them. Timings of the finished stream (retrieval time,
+        time-to-first-token and total time, in seconds from the call) are
+        stored in ``last_stream_stats``.
+        """
+        tracer = get_tracer()
+        start = time.perf_counter()
+        # The span only covers retrieval: a generator may be resumed from
+        # another context, where the span could not be closed
+        with tracer.span("stream.retrieve", top_k=top_k, **tracer.query_attributes(query)):
+            search_results = self.retrieve_ranked(query, top_k)
+            prompt = self.build_prompt(query, search_results)
+        retrieval_time = time.perf_counter() - start
+
+        first_token_time = None
+        num_tokens = 0
+        for token in self.generator.stream(prompt):
+            if first_token_time is None:
+                first_token_time = time.perf_counter() - start
+            num_tokens += 1
+            yield token
+
+        self.last_stream_stats = {
+            "retrieval_time": retrieval_time,
+            "time_to_first_token": first_token_time,
+            "total_time": time.perf_counter() - start,
+            "num_tokens": num_tokens,
+        }
+        tracer.count("rag_queries_total")
+        tracer.count("rag_retrieved_chunks_total", len(self.extract_contexts(search_results)))
+        if first_token_time is not None:
+            tracer.observe("rag_time_to_first_token_seconds", first_token_time)
+        tracer.observe("rag_stream_seconds", self.last_stream_stats["total_time"])
+
+    async def aquery(self, query, top_k=5, use_history=False):
+        """
+        Async ``query``: encoding runs in ``encode_executor`` and the index
+        query and LLM call are awaited, so many requests can be in flight.
+
+        :param use_history: Go through the generator's conversation history.
+            Off by default: concurrent requests would interleave their turns
+            in the shared history and leak into each other's prompts.
+        """
+        tracer = get_tracer()
+        with tracer.span("query", top_k=top_k, **tracer.query_attributes(query)) as span:
+            search_results = await self.aretrieve_ranked(query, top_k)
+            prompt = self.build_prompt(query, search_results)
+            with tracer.span("generate", prompt_chars=len(prompt)):
+                if use_history:
+                    answer = await self.generator.agenerate(prompt)
+                else:
+                    answer = await self.generator.acomplete(prompt)
+            result = self.make_result(query, answer, search_results)
+            self._record_result(tracer, span, result)
+        return result
+
+    async def agenerate_answer(self, query, top_k=5, use_history=False):
+        return (await self.aquery(query, top_k, use_history)).answer
+
+    def query_many(self, queries, top_k=5, max_workers=4):
+        """
+        Answer many independent questions at once: one encoder call for all
+        queries, one batched index query and concurrent LLM calls.
+        Answers do not go through the generator's conversation history.
+
+        :param queries: List of questions.
+        :param top_k: Number of chunks retrieved per question.
+        :param max_workers: Concurrent generator calls.
+        :return: List of ``RAGResult`` in the order of ``queries``.
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        tracer = get_tracer()
+        with tracer.span("query_many", queries=len(queries), top_k=top_k) as span:
+            search_results = self.retrieve_ranked_many(queries, top_k)
+            prompts = [
+                self.build_prompt(query, results) for query, results in zip(queries, search_results)
+            ]
+            with tracer.span("generate", prompts=len(prompts)):
+                # Each call runs in a copy of this context so its spans keep their parent
+                contexts = [contextvars.copy_context() for _ in prompts]
+                with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prompts)))) as pool:
+                    answers = list(pool.map(
+                        lambda context, prompt: context.run(self.generator.complete, prompt),
+                        contexts,
+                        prompts,
+                    ))
+            results = [
+                self.make_result(query, answer, results)
+                for query, answer, results in zip(queries, answers, search_results)
+            ]
+            chunks = sum(len(result.contexts) for result in results)
+            span.set("chunks", chunks)
+            tracer.count("rag_queries_total", len(results))
+            tracer.count("rag_retrieved_chunks_total", chunks)
+        return results
+
+    def generate_answers(self, queries, top_k=5, max_workers=4):
+        """Answers of ``query_many``."""
+        return [result.answer for result in self.query_many(queries, top_k, max_workers)]
@@ -0,0 +1,101 @@
+import threading
+import time
+
+from indexer.base import QueryResult
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores retrieved chunks with a local cross-encoder and keeps the best
+    ``top_n``.
+
+    Candidates are scored in batches of ``batch_size``. The first batch
+    always runs, so the moving average of batch times is re-measured on
+    every call and recovers from outliers; each further batch only starts if
+    it is expected to finish within the per-query ``time_budget_ms``,
+    otherwise the original vector order is kept instead (counted in
+    ``fallbacks``). A first batch slower than the budget still runs past it.
+    """
+
+    def __init__(self, model_name, candidates=20, top_n=3, batch_size=16, time_budget_ms=300):
+        self.model_name = model_name
+        self._model = None
+        self.model_lock = threading.Lock()
+        self.candidates = candidates
+        self.top_n = top_n
+        self.batch_size = batch_size
+        self.time_budget = time_budget_ms / 1000
+        self.stats_lock = threading.Lock()
+        self.reranked = 0
+        self.fallbacks = 0
+        # Moving average of the seconds one batch takes
+        self.batch_seconds = 0.0
+
+    @property
+    def model(self):
+        # Loaded on the first rerank so building the engine stays cheap
+        if self._model is None:
+            with self.model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    import torch
+                    self._model = CrossEncoder(
+                        self.model_name,
+                        device="cuda" if torch.cuda.is_available() else "cpu",
+                    )
+        return self._model
+
+    def rerank(self, query, search_results, top_n=None):
+        """
+        :param query: User question.
+        :param search_results: Index results (anything with ``.matches``).
+        :param top_n: Chunks to keep, defaults to ``self.top_n``.
+        :return: ``QueryResult`` with the best ``top_n`` matches (whatever
+            result type the index returned).
+        """
+        top_n = top_n or self.top_n
+        matches = list(getattr(search_results, "matches", None) or [])
+        texts = [str((match.metadata or {}).get("text", "")) for match in matches]
+
+        # Loaded (on the first call) outside the budget and the batch timings
+        model = self.model
+        deadline = time.perf_counter() + self.time_budget
+        scores = []
+        for i in range(0, len(matches), self.batch_size):
+            start = time.perf_counter()
+            if scores and start + self.batch_seconds > deadline:
+                with self.stats_lock:
+                    self.fallbacks += 1
+                return QueryResult(matches=matches[:top_n])
+            batch = [(query, text) for text in texts[i:i + self.batch_size]]
+            scores.extend(float(score) for score in model.predict(batch))
+            elapsed = time.perf_counter() - start
+            with self.stats_lock:
+                self.batch_seconds = elapsed if not self.batch_seconds else 0.8 * self.batch_seconds + 0.2 * elapsed
+
+        with self.stats_lock:
+            self.reranked += 1
+        order = sorted(range(len(matches)), key=lambda i: scores[i], reverse=True)
+        return QueryResult(matches=[matches[i] for i in order[:top_n]])
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "reranked": self.reranked,
+                "fallbacks": self.fallbacks,
+                "batch_ms": self.batch_seconds * 1000,
+            }
+
+
+def create_reranker(config):
+    """Build the reranker from the ``reranker`` section of config.yaml, None when disabled."""
+    reranker_config = config.get("reranker") or {}
+    if not reranker_config.get("enabled"):
+        return None
+    return CrossEncoderReranker(
+        model_name=reranker_config.get("model_name", "BAAI/bge-reranker-v2-m3"),
+        candidates=reranker_config.get("candidates", 20),
+        top_n=reranker_config.get("top_n", 3),
+        batch_size=reranker_config.get("batch_size", 16),
+        time_budget_ms=reranker_config.get("time_budget_ms", 300),
+    )
@@ -0,0 +1,260 @@
+import contextvars
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+# Histogram buckets (seconds) of span durations
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, key, value):
+        pass
+
+
+class NoopTracer:
+    """
+    Default tracer: every call is a no-op returning a shared object, so
+    instrumented code costs a method call per span when tracing is off.
+    """
+
+    enabled = False
+    _span = _NoopSpan()
+    _no_attributes = {}
+
+    def span(self, name, **attributes):
+        return self._span
+
+    def query_attributes(self, query):
+        return self._no_attributes
+
+    def count(self, name, value=1, **labels):
+        pass
+
+    def observe(self, name, value, **labels):
+        pass
+
+    def add_collector(self, collector):
+        pass
+
+    def prometheus_text(self):
+        return ""
+
+    def close(self):
+        pass
+
+
+class Span:
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(tracer.ids)
+        self.parent = None
+        self.trace_id = self.span_id
+        self.start = None
+        self.token = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.parent = self.tracer.current.get()
+        if self.parent is not None:
+            self.trace_id = self.parent.trace_id
+        self.token = self.tracer.current.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        duration = time.perf_counter() - self.start
+        self.tracer.current.reset(self.token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.tracer.finish(self, duration)
+        return False
+
+
+class Tracer:
+    """
+    Records spans and metrics of the RAG pipeline.
+
+    Spans nest per thread / asyncio task (``contextvars``); each finished
+    span is observed in the ``rag_span_seconds`` histogram and, with
+    ``jsonl_path``, appended there as one JSON line
+    ``{"trace", "span", "parent", "name", "start", "duration_ms", ...attributes}``
+    so slow requests can be found and broken down afterwards.
+
+    User questions are logged as ``query_sha1`` / ``query_chars`` only,
+    unless ``log_queries`` is set.
+
+    ``count`` / ``observe`` feed counters and histograms; collectors are
+    callables yielding ``(name, labels, value)`` gauges read at export time
+    (e.g. cache hit rates). Bound methods are held through weak references,
+    so registering one does not keep its object alive. ``prometheus_text``
+    renders everything in the Prometheus text exposition format.
+    """
+
+    enabled = True
+
+    def __init__(self, jsonl_path=None, buckets=DEFAULT_BUCKETS, log_queries=False):
+        self.buckets = tuple(buckets)
+        self.log_queries = log_queries
+        self.ids = itertools.count(1)
+        self.current = contextvars.ContextVar("rag_span", default=None)
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.collectors = []
+        self.file = None
+        if jsonl_path:
+            os.makedirs(os.path.dirname(jsonl_path) or ".", exist_ok=True)
+            # Line buffered: every span reaches the file even if the process dies
+            self.file = open(jsonl_path, "a", encoding="utf-8", buffering=1)
+
+    def span(self, name, **attributes):
+        return Span(self, name, attributes)
+
+    def query_attributes(self, query):
+        """Span attributes describing a user question without (by default) its text."""
+        attributes = {
+            "query_sha1": hashlib.sha1(query.encode("utf-8")).hexdigest()[:16],
+            "query_chars": len(query),
+        }
+        if self.log_queries:
+            attributes["query"] = query
+        return attributes
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def count(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][bisect_left(self.buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def add_collector(self, collector):
+        if hasattr(collector, "__self__"):
+            reference = weakref.WeakMethod(collector)
+        else:
+            reference = lambda: collector
+        with self.lock:
+            self.collectors.append(reference)
+
+    def finish(self, span, duration):
+        self.observe("rag_span_seconds", duration, span=span.name)
+        if self.file is not None:
+            record = {
+                "trace": span.trace_id,
+                "span": span.span_id,
+                "parent": span.parent.span_id if span.parent is not None else None,
+                "name": span.name,
+                "start": time.time() - duration,
+                "duration_ms": duration * 1000,
+                **span.attributes,
+            }
+            line = json.dumps(record, ensure_ascii=False, default=str)
+            with self.lock:
+                self.file.write(line + "\n")
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        items = list(labels) + list(extra)
+        if not items:
+            return ""
+        return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+    def prometheus_text(self):
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        for (name, labels), (bucket_counts, total, count) in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{self._labels(labels)} {total}")
+            lines.append(f"{name}_count{self._labels(labels)} {count}")
+        with self.lock:
+            # Drop collectors whose object has been garbage collected
+            self.collectors = [reference for reference in self.collectors if reference() is not None]
+            collectors = [reference() for reference in self.collectors]
+        # Samples of one metric family must be contiguous in the exposition
+        gauges = {}
+        for collector in collectors:
+            if collector is None:
+                continue
+            for name, labels, value in collector():
+                gauges.setdefault(name, []).append((sorted(labels.items()), value))
+        for name, samples in gauges.items():
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{self._labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+_tracer = NoopTracer()
+
+
+def get_tracer():
+    return _tracer
+
+
+def set_tracer(tracer):
+    """Install ``tracer`` process-wide (``None`` restores the no-op tracer)."""
+    global _tracer
+    _tracer = tracer or NoopTracer()
+    return _tracer
+
+
+def create_tracer(config):
+    """Install the tracer described by the ``tracing`` section of config.yaml."""
+    tracing_config = config.get("tracing") or {}
+    if not tracing_config.get("enabled"):
+        return set_tracer(None)
+    return set_tracer(Tracer(
+        jsonl_path=tracing_config.get("jsonl_path"),
+        log_queries=tracing_config.get("log_queries", False),
+    ))
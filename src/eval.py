@@ -1,6 +1,9 @@
+import hashlib
 import json
+import os
 import yaml
 import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Dict, Tuple
 import numpy as np
@@ -13,12 +16,15 @@ from rouge_score import rouge_scorer
 from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
 import nltk
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 
 # RAG components
-from indexer.pinecone import PineconeIndex
-from generator.groq_model import GroqModel
+from indexer.factory import create_indexer
+from indexer.manifest import file_digest
+from generator.factory import create_generator
+from generator.rate_limit import RateLimitedGenerator, RateLimiter
 from engine.rag_engine import RAGEngine
+from engine.reranker import create_reranker
+from generator.prompt import PROMPT_TEMPLATE
 
 # Download required NLTK data
 try:
@@ -31,61 +37,93 @@ try:
 except LookupError:
     nltk.download('punkt_tab')
 
+SENTENCE_MODEL = 'all-MiniLM-L6-v2'
+
 class RAGEvaluator:
-    def __init__(self, config_path="config.yaml"):
+    def __init__(self, config_path="config.yaml", embedding_cache_dir="eval_cache"):
         with open(config_path, "r") as file:
             self.config = yaml.safe_load(file)
         
         # Initialize RAG components
-        pinecone_config = self.config.get("pinecone")
-        generator_config = self.config.get("generator")
-        
-        self.indexer = PineconeIndex(
-            index_name=pinecone_config["index_name"],
-            model_name=pinecone_config["model_name"],
-            dimension=pinecone_config["dimension"],
+        self.eval_config = self.config.get("evaluation") or {}
+        
+        self.indexer = create_indexer(self.config)
+        self.generator = create_generator(self.config)
+        # Concurrent generation stays under the API rate limits and retries on 429
+        self.rate_limited_generator = RateLimitedGenerator(
+            self.generator,
+            RateLimiter(
+                requests_per_minute=self.eval_config.get("requests_per_minute"),
+                tokens_per_minute=self.eval_config.get("tokens_per_minute"),
+            ),
+            max_retries=self.eval_config.get("max_retries", 5),
+            backoff=self.eval_config.get("backoff", 2.0),
         )
-        self.generator = GroqModel(
-            model_name=generator_config["model_name"],
+        self.rag_engine = RAGEngine(
+            indexer=self.indexer,
+            generator=self.rate_limited_generator,
+            reranker=create_reranker(self.config),
+            **(self.config.get("engine") or {}),
         )
-        self.rag_engine = RAGEngine(indexer=self.indexer, generator=self.generator)
         
         # Initialize evaluation metrics
         self.rouge_scorer = rouge_scorer.RougeScorer(['rouge1', 'rouge2', 'rougeL'], use_stemmer=True)
-        self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.sentence_model = SentenceTransformer(SENTENCE_MODEL)
+        # Embeddings của các đoạn văn theo từng file wiki (None để tắt)
+        self.embedding_cache_dir = embedding_cache_dir
         self.smoothing = SmoothingFunction().method1
         
-    def generate_qa_dataset(self, wiki_data_path: str, num_questions_per_file: int = 5) -> List[Dict]:
+    def generate_qa_dataset(self, wiki_data_path: str, num_questions_per_file: int = 5,
+                            seed: int = 0, max_workers: int = 4) -> List[Dict]:
         """
         Tạo bộ dữ liệu câu hỏi-đáp từ wiki_data
+        
+        Files are processed in parallel; each draws its questions from its
+        own RNG seeded with ``seed`` and the file name, so the dataset does
+        not depend on scheduling or on which other files are present.
         """
         print("Generating Q&A dataset from wiki data...")
         qa_dataset = []
         
-        wiki_files = list(Path(wiki_data_path).glob("*.json"))
+        wiki_files = sorted(Path(wiki_data_path).glob("*.json"))
         
-        for file_path in tqdm(wiki_files, desc="Processing wiki files"):
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            title = data["raw_content"]["title"]
-            content_paragraphs = data["raw_content"]["content"]
-            
-            # Tạo câu hỏi từ nội dung
-            questions = self._generate_questions_from_content(title, content_paragraphs, num_questions_per_file)
-            
-            for question_data in questions:
-                qa_dataset.append({
-                    "question": question_data["question"],
-                    "reference_answer": question_data["answer"],
-                    "source_file": str(file_path),
-                    "title": title,
-                    "relevant_context": question_data["context"]
-                })
+        def process_file(file_path):
+            return self._generate_qa_from_file(file_path, num_questions_per_file, seed)
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            for file_qa in tqdm(pool.map(process_file, wiki_files), total=len(wiki_files),
+                                desc="Processing wiki files"):
+                qa_dataset.extend(file_qa)
         
         return qa_dataset
     
-    def _generate_questions_from_content(self, title: str, content_paragraphs: List[str], num_questions: int) -> List[Dict]:
+    def _generate_qa_from_file(self, file_path: Path, num_questions: int, seed: int) -> List[Dict]:
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        
+        title = data["raw_content"]["title"]
+        content_paragraphs = data["raw_content"]["content"]
+        
+        # Tạo câu hỏi từ nội dung
+        rng = random.Random(f"{seed}:{file_path.name}")
+        cache_key = file_digest(file_path) if self.embedding_cache_dir else None
+        questions = self._generate_questions_from_content(
+            title, content_paragraphs, num_questions, rng=rng, cache_key=cache_key
+        )
+        
+        return [
+            {
+                "question": question_data["question"],
+                "reference_answer": question_data["answer"],
+                "source_file": str(file_path),
+                "title": title,
+                "relevant_context": question_data["context"]
+            }
+            for question_data in questions
+        ]
+    
+    def _generate_questions_from_content(self, title: str, content_paragraphs: List[str], num_questions: int,
+                                         rng: random.Random = random, cache_key: str = None) -> List[Dict]:
         """
         Tạo câu hỏi từ nội dung wiki
         """
@@ -112,12 +150,15 @@ class RAGEvaluator:
             return questions
         
         # Tạo câu hỏi và câu trả lời
-        selected_questions = random.sample(question_templates, min(num_questions, len(question_templates)))
+        selected_questions = rng.sample(question_templates, min(num_questions, len(question_templates)))
         
-        for question in selected_questions:
-            # Tìm đoạn văn phù hợp nhất cho câu hỏi
-            relevant_paragraph = self._find_most_relevant_paragraph(question, informative_paragraphs)
-            
+        # Tìm đoạn văn phù hợp nhất cho mọi câu hỏi (mỗi đoạn văn chỉ encode một lần)
+        paragraph_embeddings = self._paragraph_embeddings(informative_paragraphs, cache_key)
+        relevant_paragraphs = self._find_most_relevant_paragraphs(
+            selected_questions, informative_paragraphs, paragraph_embeddings
+        )
+        
+        for question, relevant_paragraph in zip(selected_questions, relevant_paragraphs):
             if relevant_paragraph:
                 # Tạo câu trả lời từ đoạn văn
                 answer = self._extract_answer_from_paragraph(question, relevant_paragraph, title)
@@ -130,21 +171,52 @@ class RAGEvaluator:
         
         return questions
     
+    def _paragraph_embeddings(self, paragraphs: List[str], cache_key: str = None) -> np.ndarray:
+        """
+        Normalized embeddings of ``paragraphs``. With a ``cache_key`` (hash
+        of the source file) they are stored in ``embedding_cache_dir`` and
+        reused by later runs until the file changes.
+        """
+        cache_path = None
+        if cache_key and self.embedding_cache_dir:
+            cache_path = os.path.join(self.embedding_cache_dir, f"{SENTENCE_MODEL}-{cache_key}.npy")
+            if os.path.exists(cache_path):
+                embeddings = np.load(cache_path)
+                if len(embeddings) == len(paragraphs):
+                    return embeddings
+        
+        embeddings = self.sentence_model.encode(paragraphs, normalize_embeddings=True, convert_to_numpy=True)
+        if cache_path:
+            os.makedirs(self.embedding_cache_dir, exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, embeddings)
+            os.replace(tmp_path, cache_path)
+        return embeddings
+    
     def _find_most_relevant_paragraph(self, question: str, paragraphs: List[str]) -> str:
         """
         Tìm đoạn văn liên quan nhất đến câu hỏi
         """
         if not paragraphs:
             return ""
+        return self._find_most_relevant_paragraphs([question], paragraphs)[0]
+    
+    def _find_most_relevant_paragraphs(self, questions: List[str], paragraphs: List[str],
+                                       paragraph_embeddings: np.ndarray = None) -> List[str]:
+        """
+        Đoạn văn liên quan nhất cho từng câu hỏi
+        """
+        if paragraph_embeddings is None:
+            paragraph_embeddings = self._paragraph_embeddings(paragraphs)
         
         # Sử dụng sentence similarity để tìm đoạn văn phù hợp
-        question_embedding = self.sentence_model.encode([question])
-        paragraph_embeddings = self.sentence_model.encode(paragraphs)
-        
-        similarities = cosine_similarity(question_embedding, paragraph_embeddings)[0]
-        best_idx = np.argmax(similarities)
+        question_embeddings = self.sentence_model.encode(
+            questions, normalize_embeddings=True, convert_to_numpy=True
+        )
+        best_idx = np.argmax(question_embeddings @ paragraph_embeddings.T, axis=1)
         
-        return paragraphs[best_idx]
+        return [paragraphs[i] for i in best_idx]
     
     def _extract_answer_from_paragraph(self, question: str, paragraph: str, title: str) -> str:
         """
@@ -157,6 +229,30 @@ class RAGEvaluator:
         else:
             return paragraph
     
+    def _retrieve_texts(self, queries: List[str], top_k: int) -> List:
+        """
+        Texts of the top ``top_k`` chunks of every query (one batched encode
+        and index query); ``None`` for queries whose search failed.
+        
+        Goes through the engine's retrieval cache, so ``evaluate_generation``
+        reuses these results instead of searching again.
+        """
+        try:
+            return [
+                RAGEngine.extract_contexts(search_results)
+                for search_results in self.rag_engine.retrieve_ranked_many(queries, top_k)
+            ]
+        except Exception as e:
+            print(f"Batched retrieval failed ({e}), searching queries one by one")
+        retrieved = []
+        for query in tqdm(queries, desc="Evaluating retrieval"):
+            try:
+                retrieved.append(RAGEngine.extract_contexts(self.rag_engine.retrieve_ranked(query, top_k)))
+            except Exception as e:
+                print(f"Error processing retrieval for query '{query}': {e}")
+                retrieved.append(None)
+        return retrieved
+    
     def evaluate_retrieval(self, qa_dataset: List[Dict], top_k: int = 5) -> Dict:
         """
         Đánh giá chất lượng retrieval
@@ -170,50 +266,46 @@ class RAGEvaluator:
             'hit_rate': []
         }
         
-        for qa_item in tqdm(qa_dataset, desc="Evaluating retrieval"):
-            query = qa_item["question"]
-            relevant_context = qa_item["relevant_context"]
-            
-            try:
-                # Tìm kiếm documents
-                search_results = self.indexer.search(query, top_k)
-                retrieved_texts = []
-                
-                if hasattr(search_results, 'matches') and search_results.matches:
-                    for match in search_results.matches:
-                        if hasattr(match, 'metadata') and match.metadata:
-                            text = match.metadata.get('text', '')
-                            if text:
-                                retrieved_texts.append(str(text))
-                
-                # Tính precision và recall
-                relevant_retrieved = 0
-                reciprocal_rank = 0
-                
-                for i, retrieved_text in enumerate(retrieved_texts):
-                    # Kiểm tra xem text có liên quan không (sử dụng similarity)
-                    similarity = self._calculate_text_similarity(relevant_context, retrieved_text)
-                    if similarity > 0.7:  # threshold
-                        relevant_retrieved += 1
-                        if reciprocal_rank == 0:
-                            reciprocal_rank = 1 / (i + 1)
-                
-                precision = relevant_retrieved / len(retrieved_texts) if retrieved_texts else 0
-                recall = relevant_retrieved / 1  # Giả sử có 1 document liên quan
-                hit_rate = 1 if relevant_retrieved > 0 else 0
-                
-                retrieval_scores['precision_at_k'].append(precision)
-                retrieval_scores['recall_at_k'].append(recall)
-                retrieval_scores['mrr'].append(reciprocal_rank)
-                retrieval_scores['hit_rate'].append(hit_rate)
-                
-            except Exception as e:
-                print(f"Error processing retrieval for query '{query}': {e}")
+        queries = [qa_item["question"] for qa_item in qa_dataset]
+        retrieved = self._retrieve_texts(queries, top_k)
+        
+        # Độ tương đồng của mọi cặp (context liên quan, đoạn tìm được), encode một lần
+        pairs = [
+            (qa_item["relevant_context"], retrieved_text)
+            for qa_item, retrieved_texts in zip(qa_dataset, retrieved)
+            for retrieved_text in retrieved_texts or []
+        ]
+        similarities = iter(self._pairwise_similarities(pairs))
+        
+        for query, retrieved_texts in zip(queries, retrieved):
+            if retrieved_texts is None:
                 # Thêm giá trị mặc định
                 retrieval_scores['precision_at_k'].append(0.0)
                 retrieval_scores['recall_at_k'].append(0.0)
                 retrieval_scores['mrr'].append(0.0)
                 retrieval_scores['hit_rate'].append(0.0)
+                continue
+            
+            # Tính precision và recall
+            relevant_retrieved = 0
+            reciprocal_rank = 0
+            
+            for i, retrieved_text in enumerate(retrieved_texts):
+                # Kiểm tra xem text có liên quan không (sử dụng similarity)
+                similarity = next(similarities)
+                if similarity > 0.7:  # threshold
+                    relevant_retrieved += 1
+                    if reciprocal_rank == 0:
+                        reciprocal_rank = 1 / (i + 1)
+            
+            precision = relevant_retrieved / len(retrieved_texts) if retrieved_texts else 0
+            recall = relevant_retrieved / 1  # Giả sử có 1 document liên quan
+            hit_rate = 1 if relevant_retrieved > 0 else 0
+            
+            retrieval_scores['precision_at_k'].append(precision)
+            retrieval_scores['recall_at_k'].append(recall)
+            retrieval_scores['mrr'].append(reciprocal_rank)
+            retrieval_scores['hit_rate'].append(hit_rate)
         
         # Tính trung bình
         avg_scores = {
@@ -225,11 +317,106 @@ class RAGEvaluator:
         
         return avg_scores
     
-    def evaluate_generation(self, qa_dataset: List[Dict]) -> Dict:
+    @staticmethod
+    def _load_checkpoint(checkpoint_path: str, run_key: str = None) -> Dict[str, Dict]:
+        answers = {}
+        stale = 0
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Dòng cuối bị cắt ngang khi tiến trình bị dừng
+                        continue
+                    # Câu trả lời của cấu hình khác (model, prompt, index) không được dùng lại
+                    if record.get("run") != run_key:
+                        stale += 1
+                        continue
+                    answers[record["question"]] = record
+        if stale:
+            print(f"Ignoring {stale} answers in {checkpoint_path} from a different model, prompt or index")
+        return answers
+
+    def _run_key(self) -> str:
+        """
+        Fingerprint of everything an answer depends on: generator backend and
+        model, system prompt and prompt template, index / retrieval settings
+        and the ingested chunks (manifest).
+        """
+        generator_config = self.config.get("generator") or {}
+        payload = {
+            "generator": [generator_config.get("backend", "groq"), generator_config.get("model_name")],
+            "system_prompt": getattr(self.generator, "system_prompt", None),
+            "prompt_template": PROMPT_TEMPLATE,
+            "retrieval": {
+                section: self.config.get(section)
+                for section in ("pinecone", "indexer", "hybrid", "reranker")
+            },
+            "index": self.indexer.manifest.sources,
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+    
+    def _generate_answers(self, questions: List[str], workers: int, checkpoint_path: str = None) -> Dict[str, Dict]:
+        """
+        Answer ``questions`` with ``workers`` concurrent, history-free LLM
+        calls. Every answer is appended to the JSONL ``checkpoint_path`` as
+        soon as it arrives, tagged with ``_run_key()``; answers already in it
+        with the same key are not generated again.
+        
+        Returns:
+            Dict[str, Dict]: question -> {"question", "answer", "contexts"};
+            questions that failed are missing
+        """
+        run_key = self._run_key() if checkpoint_path else None
+        answers = self._load_checkpoint(checkpoint_path, run_key)
+        if answers:
+            print(f"Resuming from {checkpoint_path}: {len(answers)} answers already generated")
+        pending = [question for question in dict.fromkeys(questions) if question not in answers]
+        if not pending:
+            return answers
+        
+        # Một lần retrieval (batch) cho mọi câu hỏi, các worker sau đó lấy từ cache
+        self.rag_engine.retrieve_ranked_many(pending)
+        
+        checkpoint = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                futures = {
+                    pool.submit(self.rag_engine.query, question, use_history=False): question
+                    for question in pending
+                }
+                for future in tqdm(as_completed(futures), total=len(futures), desc="Generating answers"):
+                    question = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Error processing question '{question}': {e}")
+                        continue
+                    record = {"question": question, "answer": result.answer, "contexts": result.contexts}
+                    answers[question] = record
+                    if checkpoint:
+                        record = {"run": run_key, **record}
+                        checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        checkpoint.flush()
+        finally:
+            if checkpoint:
+                checkpoint.close()
+        return answers
+    
+    def evaluate_generation(self, qa_dataset: List[Dict], workers: int = None, checkpoint_path: str = None) -> Dict:
         """
         Đánh giá chất lượng generation
+        
+        Answers are generated concurrently (``workers``, default from the
+        ``evaluation`` config) and checkpointed to ``checkpoint_path``;
+        the metrics are computed afterwards in dataset order.
         """
         print("Evaluating generation performance...")
+        if workers is None:
+            workers = self.eval_config.get("workers", 4)
+        answers = self._generate_answers([qa_item["question"] for qa_item in qa_dataset], workers, checkpoint_path)
         
         generation_scores = {
             'bleu_scores': [],
@@ -239,46 +426,32 @@ class RAGEvaluator:
             'answer_relevancy_scores': []
         }
         
+        # Các cặp văn bản cần so sánh của mỗi câu hỏi, tính một lần ở cuối
+        # (BERTScore, faithfulness, answer relevancy)
+        similarity_pairs = []
+        
         for qa_item in tqdm(qa_dataset, desc="Evaluating generation"):
             question = qa_item["question"]
             reference_answer = qa_item["reference_answer"]
             
             try:
-                # Tạo câu trả lời từ RAG
-                generated_answer = self.rag_engine.generate_answer(question)
+                # Câu trả lời từ RAG (kèm các context đã dùng để trả lời)
+                result = answers[question]
+                generated_answer = result["answer"]
                 
                 # BLEU Score
                 bleu_score = self._calculate_bleu_score(reference_answer, generated_answer)
-                generation_scores['bleu_scores'].append(bleu_score)
                 
                 # ROUGE Score
                 rouge_scores = self.rouge_scorer.score(reference_answer, generated_answer)
-                for metric in ['rouge1', 'rouge2', 'rougeL']:
-                    generation_scores['rouge_scores'][metric].append(rouge_scores[metric].fmeasure)
-                
-                # BERTScore (sử dụng sentence similarity)
-                bert_score = self._calculate_text_similarity(reference_answer, generated_answer)
-                generation_scores['bert_scores'].append(bert_score)
-                
-                # Faithfulness (độ trung thực với context)
-                search_results = self.indexer.search(question, 3)
-                if hasattr(search_results, 'matches') and search_results.matches:
-                    context_texts = []
-                    for match in search_results.matches:
-                        if hasattr(match, 'metadata') and match.metadata:
-                            text = match.metadata.get('text', '')
-                            if text:
-                                context_texts.append(str(text))
-                    context_text = " ".join(context_texts)
-                else:
-                    context_text = ""
                 
-                faithfulness = self._calculate_faithfulness(generated_answer, context_text)
-                generation_scores['faithfulness_scores'].append(faithfulness)
+                # Faithfulness (độ trung thực với context): 3 context đầu của chính lần retrieval đó
+                context_text = " ".join(result["contexts"][:3])
                 
-                # Answer Relevancy (độ liên quan của câu trả lời với câu hỏi)
-                relevancy = self._calculate_text_similarity(question, generated_answer)
-                generation_scores['answer_relevancy_scores'].append(relevancy)
+                generation_scores['bleu_scores'].append(bleu_score)
+                for metric in ['rouge1', 'rouge2', 'rougeL']:
+                    generation_scores['rouge_scores'][metric].append(rouge_scores[metric].fmeasure)
+                similarity_pairs.append((reference_answer, generated_answer, question, context_text))
                 
             except Exception as e:
                 print(f"Error processing question '{question}': {e}")
@@ -286,9 +459,28 @@ class RAGEvaluator:
                 generation_scores['bleu_scores'].append(0.0)
                 for metric in ['rouge1', 'rouge2', 'rougeL']:
                     generation_scores['rouge_scores'][metric].append(0.0)
+                similarity_pairs.append(None)
+        
+        # BERTScore (sử dụng sentence similarity), faithfulness và answer relevancy
+        pairs = []
+        for item in similarity_pairs:
+            if item is not None:
+                reference_answer, generated_answer, question, context_text = item
+                pairs += [(reference_answer, generated_answer), (question, generated_answer)]
+                if context_text.strip():
+                    pairs.append((generated_answer, context_text))
+        similarities = iter(self._pairwise_similarities(pairs))
+        for item in similarity_pairs:
+            if item is None:
                 generation_scores['bert_scores'].append(0.0)
                 generation_scores['faithfulness_scores'].append(0.0)
                 generation_scores['answer_relevancy_scores'].append(0.0)
+                continue
+            generation_scores['bert_scores'].append(next(similarities))
+            generation_scores['answer_relevancy_scores'].append(next(similarities))
+            generation_scores['faithfulness_scores'].append(
+                next(similarities) if item[3].strip() else 0.0
+            )
         
         # Tính trung bình
         avg_scores = {
@@ -316,9 +508,24 @@ class RAGEvaluator:
         """
         Tính độ tương đồng giữa hai văn bản
         """
-        embeddings = self.sentence_model.encode([text1, text2])
-        similarity = cosine_similarity([embeddings[0]], [embeddings[1]])[0][0]
-        return similarity
+        return self._pairwise_similarities([(text1, text2)])[0]
+    
+    def _pairwise_similarities(self, pairs: List[Tuple[str, str]], batch_size: int = 64) -> np.ndarray:
+        """
+        Cosine similarity of every ``(text1, text2)`` pair. Each distinct text
+        is encoded once, in large batches, and all similarities come from a
+        single row-wise dot product of the normalized embeddings.
+        """
+        if not pairs:
+            return np.zeros(0, dtype=np.float32)
+        texts = list(dict.fromkeys(text for pair in pairs for text in pair))
+        position = {text: i for i, text in enumerate(texts)}
+        embeddings = self.sentence_model.encode(
+            texts, batch_size=batch_size, normalize_embeddings=True, convert_to_numpy=True
+        )
+        left = embeddings[[position[text1] for text1, _ in pairs]]
+        right = embeddings[[position[text2] for _, text2 in pairs]]
+        return np.einsum("ij,ij->i", left, right).astype(np.float64)
     
     def _calculate_faithfulness(self, answer: str, context: str) -> float:
         """
@@ -330,14 +537,15 @@ class RAGEvaluator:
         # Sử dụng similarity để đánh giá faithfulness
         return self._calculate_text_similarity(answer, context)
     
-    def run_full_evaluation(self, wiki_data_path: str, output_path: str = "evaluation_results.json"):
+    def run_full_evaluation(self, wiki_data_path: str, output_path: str = "evaluation_results.json",
+                            seed: int = 0, workers: int = 4):
         """
         Chạy đánh giá toàn diện
         """
         print("Starting full RAG evaluation...")
         
         # 1. Tạo dataset
-        qa_dataset = self.generate_qa_dataset(wiki_data_path)
+        qa_dataset = self.generate_qa_dataset(wiki_data_path, seed=seed, max_workers=workers)
         print(f"Generated {len(qa_dataset)} Q&A pairs")
         
         # Lưu dataset
@@ -347,10 +555,11 @@ class RAGEvaluator:
         # 2. Đánh giá retrieval
         retrieval_results = self.evaluate_retrieval(qa_dataset)
         
-        # 3. Đánh giá generation (chỉ lấy một phần để tiết kiệm thời gian)
-        sample_size = min(20, len(qa_dataset))
-        sample_dataset = random.sample(qa_dataset, sample_size)
-        generation_results = self.evaluate_generation(sample_dataset)
+        # 3. Đánh giá generation (toàn bộ dataset, hoặc một mẫu nếu có cấu hình sample_size)
+        sample_size = min(self.eval_config.get("sample_size") or len(qa_dataset), len(qa_dataset))
+        sample_dataset = random.Random(seed).sample(qa_dataset, sample_size)
+        checkpoint_path = self.eval_config.get("checkpoint")
+        generation_results = self.evaluate_generation(sample_dataset, checkpoint_path=checkpoint_path)
         
         # 4. Tổng hợp kết quả
         final_results = {
@@ -368,6 +577,10 @@ class RAGEvaluator:
         with open(output_path, "w", encoding="utf-8") as f:
             json.dump(final_results, f, ensure_ascii=False, indent=2)
         
+        # Checkpoint chỉ dùng để tiếp tục một lần chạy bị dừng giữa chừng
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        
         # In kết quả
         self._print_results(final_results)
         
@@ -428,11 +641,15 @@ def main():
     parser.add_argument("--wiki_data", default="src/data/wiki_data", help="Path to wiki data directory")
     parser.add_argument("--output", default="evaluation_results.json", help="Output file for results")
     parser.add_argument("--config", default="src/config.yaml", help="Config file path")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for question sampling")
+    parser.add_argument("--workers", type=int, default=4, help="Wiki files processed in parallel")
+    parser.add_argument("--embedding_cache", default="eval_cache",
+                        help="Directory for per-file paragraph embeddings ('' to disable)")
     
     args = parser.parse_args()
     
-    evaluator = RAGEvaluator(args.config)
-    results = evaluator.run_full_evaluation(args.wiki_data, args.output)
+    evaluator = RAGEvaluator(args.config, embedding_cache_dir=args.embedding_cache or None)
+    results = evaluator.run_full_evaluation(args.wiki_data, args.output, seed=args.seed, workers=args.workers)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,36 @@
+import asyncio
+
+
+class BaseGenerator:
+    """
+    Interface the ``RAGEngine`` expects from an LLM backend.
+
+    Subclasses only have to implement ``complete`` (one-shot, history-free,
+    thread-safe). The defaults below derive the conversational and async
+    variants from it; backends with native streaming or async clients
+    (``GroqModel``) override them.
+    """
+
+    def __init__(self):
+        self.history = []
+
+    def complete(self, prompt):
+        raise NotImplementedError
+
+    def generate(self, prompt):
+        answer = self.complete(prompt)
+        self.history.append({"role": "user", "content": prompt})
+        self.history.append({"role": "assistant", "content": answer})
+        return answer
+
+    def stream(self, prompt):
+        yield self.generate(prompt)
+
+    async def acomplete(self, prompt):
+        return await asyncio.to_thread(self.complete, prompt)
+
+    async def agenerate(self, prompt):
+        return await asyncio.to_thread(self.generate, prompt)
+
+    def reset(self):
+        self.history = []
@@ -0,0 +1,32 @@
+GENERATOR_BACKENDS = ("groq", "stub", "replay")
+
+
+def create_generator(config, backend=None):
+    """
+    Build the LLM generator selected by ``generator.backend`` in config.yaml.
+
+    :param config: Parsed config.yaml.
+    :param backend: Overrides ``generator.backend``: ``"groq"``, ``"stub"``
+        (synthetic answers with a latency profile) or ``"replay"`` (recorded trace).
+    """
+    generator_config = config.get("generator") or {}
+    backend = backend or generator_config.get("backend", "groq")
+    if backend == "stub":
+        from generator.stub import StubGenerator
+        return StubGenerator(**(generator_config.get("stub") or {}))
+    if backend == "replay":
+        from generator.replay import ReplayGenerator
+        return ReplayGenerator(**(generator_config.get("replay") or {}))
+    if backend != "groq":
+        raise ValueError(f"Unknown generator backend {backend}, expected one of {GENERATOR_BACKENDS}")
+
+    from generator.groq_model import GroqModel
+    from generator.response_cache import create_response_cache
+    generator = GroqModel(
+        model_name=generator_config["model_name"],
+        response_cache=create_response_cache(config),
+    )
+    if generator_config.get("record_path"):
+        from generator.replay import RecordingGenerator
+        generator = RecordingGenerator(generator, generator_config["record_path"])
+    return generator
@@ -1,9 +1,21 @@
-from groq import Groq
+from generator.base import BaseGenerator
 from generator.prompt import RAG_SYSTEM
+from engine.tracing import get_tracer
 
-class GroqModel:
-    def __init__(self, model_name, system_prompt=RAG_SYSTEM):
-        self.client = Groq()
+class GroqModel(BaseGenerator):
+    def __init__(self, model_name, system_prompt=RAG_SYSTEM, response_cache=None,
+                 client_max_retries=2):
+        """
+        :param response_cache: Optional ``ResponseCache``; identical requests
+            (same model, system prompt and messages) are answered from it.
+        :param client_max_retries: Retries of the groq client itself (its
+            default); ``RateLimitedGenerator`` sets it to 0 and retries itself.
+        """
+        super().__init__()
+        self._client = None
+        self._async_client = None
+        self.client_max_retries = client_max_retries
+        self.response_cache = response_cache
         self.model_name = model_name
         self.system_prompt = system_prompt or "You are a helpful assistant."
         self.history = [
@@ -11,18 +23,150 @@ class GroqModel:
         ]
         self.max_history_length = 5
 
-    def generate(self, query):
+    def _add_user_message(self, query):
         if len(self.history) > self.max_history_length:
-            self.history = self.history[0] + self.history[-self.max_history_length:]
+            self.history = [self.history[0]] + self.history[-self.max_history_length:]
         self.history.append({"role": "user", "content": query})
-        response = self.client.chat.completions.create(
-            messages=self.history,
-            model=self.model_name,
-        ).choices[0].message.content
+
+    def _cache_key(self, messages):
+        if self.response_cache is None:
+            return None
+        return self.response_cache.make_key(self.model_name, self.system_prompt, messages)
+
+    def _cached(self, key, count_miss=True):
+        if key is None:
+            return None
+        response = self.response_cache.get(key, count_miss)
+        if response is not None or count_miss:
+            get_tracer().count("rag_llm_cache_total", result="miss" if response is None else "hit")
+        return response
+
+    def _record_usage(self, span, completion):
+        usage = getattr(completion, "usage", None)
+        if usage is None:
+            return
+        tracer = get_tracer()
+        for kind in ("prompt", "completion"):
+            tokens = getattr(usage, f"{kind}_tokens", None) or 0
+            span.set(f"{kind}_tokens", tokens)
+            tracer.count("rag_llm_tokens_total", tokens, kind=kind, model=self.model_name)
+
+    def _store(self, key, response):
+        if key is not None and response:
+            self.response_cache.set(key, response)
+
+    def _chat(self, messages):
+        key = self._cache_key(messages)
+        response = self._cached(key)
+        if response is None:
+            with get_tracer().span("llm.completion", model=self.model_name) as span:
+                completion = self.client.chat.completions.create(
+                    messages=messages,
+                    model=self.model_name,
+                )
+                self._record_usage(span, completion)
+            response = completion.choices[0].message.content
+            self._store(key, response)
+        return response
+
+    async def _achat(self, messages):
+        key = self._cache_key(messages)
+        response = self._cached(key)
+        if response is None:
+            with get_tracer().span("llm.completion", model=self.model_name) as span:
+                completion = await self.async_client.chat.completions.create(
+                    messages=messages,
+                    model=self.model_name,
+                )
+                self._record_usage(span, completion)
+            response = completion.choices[0].message.content
+            self._store(key, response)
+        return response
+
+    def _one_shot_messages(self, query):
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": query},
+        ]
+
+    def generate(self, query):
+        self._add_user_message(query)
+        response = self._chat(list(self.history))
 
         self.history.append({"role": "assistant", "content": response})
         return response
     
+    def stream(self, query):
+        """
+        Yield the answer token by token. The assembled answer (or whatever was
+        received if the consumer stops early) is appended to the history.
+        """
+        self._add_user_message(query)
+        messages = list(self.history)
+        key = self._cache_key(messages)
+        cached = self._cached(key)
+        if cached is not None:
+            self.history.append({"role": "assistant", "content": cached})
+            yield cached
+            return
+        tokens = []
+        completed = False
+        try:
+            for chunk in self.client.chat.completions.create(
+                messages=messages,
+                model=self.model_name,
+                stream=True,
+            ):
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    tokens.append(token)
+                    yield token
+            completed = True
+        finally:
+            self.history.append({"role": "assistant", "content": "".join(tokens)})
+            get_tracer().count("rag_llm_stream_chunks_total", len(tokens), model=self.model_name)
+            if completed:
+                # Only complete answers are cached
+                self._store(key, "".join(tokens))
+
+    def complete(self, query):
+        """
+        One-shot completion that neither reads nor updates the conversation
+        history, so it is safe to call from several threads at once.
+        """
+        return self._chat(self._one_shot_messages(query))
+
+    def cached_complete(self, query):
+        """Answer of ``complete(query)`` if it is in the response cache, else None (never calls the API)."""
+        return self._cached(self._cache_key(self._one_shot_messages(query)), count_miss=False)
+
+    @property
+    def client(self):
+        # Created on first use: replayed (fully cached) runs never need it
+        if self._client is None:
+            from groq import Groq
+            self._client = Groq(max_retries=self.client_max_retries)
+        return self._client
+
+    @property
+    def async_client(self):
+        # Created on first use so sync-only callers never build it
+        if self._async_client is None:
+            from groq import AsyncGroq
+            self._async_client = AsyncGroq(max_retries=self.client_max_retries)
+        return self._async_client
+
+    async def agenerate(self, query):
+        self._add_user_message(query)
+        response = await self._achat(list(self.history))
+
+        self.history.append({"role": "assistant", "content": response})
+        return response
+
+    async def acomplete(self, query):
+        """Async ``complete``: one-shot, history-free."""
+        return await self._achat(self._one_shot_messages(query))
+
     def reset(self):
         self.history = [
             {"role": "system", "content": self.system_prompt},
@@ -0,0 +1,172 @@
+import asyncio
+import random
+import threading
+import time
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) used for rate budgeting."""
+    return max(1, len(text) // 4)
+
+
+def is_rate_limit_error(error):
+    """True for HTTP 429 errors (``groq.RateLimitError`` or anything with ``status_code == 429``)."""
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def retry_after_seconds(error):
+    """``Retry-After`` header of a 429 response, if the error carries one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Token buckets for requests per minute and tokens per minute, matching
+    how Groq meters its limits. ``acquire`` blocks until both buckets can
+    pay for the call; a bucket refills continuously at ``limit / 60`` per
+    second up to its per-minute capacity. ``None`` disables a limit.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, clock=time.monotonic):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.limits = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self.available = {name: float(limit or 0) for name, limit in self.limits.items()}
+        self.updated = clock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        for name, limit in self.limits.items():
+            if limit:
+                self.available[name] = min(limit, self.available[name] + elapsed * limit / 60)
+
+    def acquire(self, tokens=0):
+        """Wait until one request of ``tokens`` tokens fits in both budgets, then take it."""
+        cost = {"requests": 1, "tokens": tokens}
+        while True:
+            with self.lock:
+                now = self.clock()
+                self._refill(now)
+                wait = 0.0
+                for name, limit in self.limits.items():
+                    if limit:
+                        needed = min(cost[name], limit) - self.available[name]
+                        wait = max(wait, needed * 60 / limit)
+                if wait <= 0:
+                    for name, limit in self.limits.items():
+                        if limit:
+                            self.available[name] -= min(cost[name], limit)
+                    return
+            time.sleep(wait)
+
+
+def disable_client_retries(generator):
+    """Turn off the API client retries of ``generator`` and of the generators it wraps."""
+    while generator is not None:
+        if "client_max_retries" in vars(generator):
+            generator.client_max_retries = 0
+        generator = vars(generator).get("generator")
+
+
+class RateLimitedGenerator:
+    """
+    Wraps a generator so every ``complete`` / ``generate`` / ``stream`` call
+    (and the async versions) first takes its share of a ``RateLimiter`` and
+    is retried with exponential backoff (plus jitter, or the server's
+    ``Retry-After``) when the API answers 429. A stream is only retried
+    before its first token. The wrapped client's own retries are turned off
+    so they do not multiply with these. Other attributes are passed through
+    to the wrapped generator.
+
+    :param expected_completion_tokens: Output tokens budgeted per call on top of the prompt.
+    """
+
+    def __init__(self, generator, limiter=None, max_retries=5, backoff=2.0, max_backoff=60.0,
+                 expected_completion_tokens=256):
+        self.generator = generator
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.expected_completion_tokens = expected_completion_tokens
+        self.retries = 0
+        disable_client_retries(generator)
+
+    def _tokens(self, prompt):
+        return estimate_tokens(prompt) + self.expected_completion_tokens
+
+    def _retry_delay(self, error, attempt):
+        """Seconds to wait before retrying after ``error``; re-raises it when it is not retried."""
+        if not is_rate_limit_error(error) or attempt == self.max_retries:
+            raise error
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt) * (0.5 + random.random() / 2)
+        self.retries += 1
+        return delay
+
+    def _call(self, method, prompt):
+        tokens = self._tokens(prompt)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(tokens)
+            try:
+                return method(prompt)
+            except Exception as e:
+                time.sleep(self._retry_delay(e, attempt))
+
+    async def _acall(self, method, prompt):
+        tokens = self._tokens(prompt)
+        for attempt in range(self.max_retries + 1):
+            # acquire sleeps, so it waits in a thread instead of blocking the loop
+            await asyncio.to_thread(self.limiter.acquire, tokens)
+            try:
+                return await method(prompt)
+            except Exception as e:
+                await asyncio.sleep(self._retry_delay(e, attempt))
+
+    def _cached(self, prompt):
+        # Cached responses cost no quota, so they skip the limiter
+        lookup = getattr(self.generator, "cached_complete", None)
+        return lookup(prompt) if lookup is not None else None
+
+    def complete(self, prompt):
+        cached = self._cached(prompt)
+        if cached is not None:
+            return cached
+        return self._call(self.generator.complete, prompt)
+
+    def generate(self, prompt):
+        return self._call(self.generator.generate, prompt)
+
+    async def acomplete(self, prompt):
+        cached = self._cached(prompt)
+        if cached is not None:
+            return cached
+        return await self._acall(self.generator.acomplete, prompt)
+
+    async def agenerate(self, prompt):
+        return await self._acall(self.generator.agenerate, prompt)
+
+    def stream(self, prompt):
+        tokens = self._tokens(prompt)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(tokens)
+            started = False
+            try:
+                for token in self.generator.stream(prompt):
+                    started = True
+                    yield token
+                return
+            except Exception as e:
+                if started:
+                    raise
+                time.sleep(self._retry_delay(e, attempt))
+
+    def __getattr__(self, name):
+        return getattr(self.generator, name)
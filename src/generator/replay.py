@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from generator.base import BaseGenerator
+from generator.stub import StubGenerator
+
+
+def prompt_key(prompt):
+    return hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+
+
+class RecordingGenerator:
+    """
+    Wraps a live generator and appends every ``complete`` / ``generate`` /
+    ``stream`` call (and their async versions) to a JSONL trace: ``{"prompt", "response", "latency",
+    "time_to_first_token"}`` (seconds). ``ReplayGenerator`` plays it back.
+    Other attributes are passed through to the wrapped generator.
+    """
+
+    def __init__(self, generator, path):
+        self.generator = generator
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _record(self, prompt, response, latency, time_to_first_token=None):
+        record = {
+            "prompt": prompt,
+            "response": response,
+            "latency": latency,
+            "time_to_first_token": time_to_first_token,
+        }
+        with self.lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _timed(self, method, prompt):
+        start = time.perf_counter()
+        response = method(prompt)
+        self._record(prompt, response, time.perf_counter() - start)
+        return response
+
+    async def _atimed(self, method, prompt):
+        start = time.perf_counter()
+        response = await method(prompt)
+        self._record(prompt, response, time.perf_counter() - start)
+        return response
+
+    def complete(self, prompt):
+        return self._timed(self.generator.complete, prompt)
+
+    def generate(self, prompt):
+        return self._timed(self.generator.generate, prompt)
+
+    async def acomplete(self, prompt):
+        return await self._atimed(self.generator.acomplete, prompt)
+
+    async def agenerate(self, prompt):
+        return await self._atimed(self.generator.agenerate, prompt)
+
+    def stream(self, prompt):
+        start = time.perf_counter()
+        first_token = None
+        tokens = []
+        for token in self.generator.stream(prompt):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            tokens.append(token)
+            yield token
+        self._record(prompt, "".join(tokens), time.perf_counter() - start, first_token)
+
+    def __getattr__(self, name):
+        return getattr(self.generator, name)
+
+
+class ReplayGenerator(BaseGenerator):
+    """
+    Answers from a trace recorded by ``RecordingGenerator``, matched on the
+    exact prompt. With ``timing`` the recorded latency (and time to first
+    token, when streaming) is reproduced. Unknown prompts raise
+    ``LookupError`` when ``strict``, otherwise they get a ``StubGenerator``
+    answer.
+    """
+
+    def __init__(self, path, timing=True, strict=False):
+        super().__init__()
+        self.path = path
+        self.timing = timing
+        self.strict = strict
+        self.fallback = StubGenerator()
+        self.records = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.records[prompt_key(record["prompt"])] = record
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, prompt):
+        record = self.records.get(prompt_key(prompt))
+        if record is None:
+            self.misses += 1
+            if self.strict:
+                raise LookupError(f"No recorded response for prompt in {self.path}")
+        else:
+            self.hits += 1
+        return record
+
+    def complete(self, prompt):
+        record = self._lookup(prompt)
+        if record is None:
+            return self.fallback.complete(prompt)
+        if self.timing and record.get("latency"):
+            time.sleep(record["latency"])
+        return record["response"]
+
+    def stream(self, prompt):
+        record = self._lookup(prompt)
+        if record is None:
+            yield from self.fallback.stream(prompt)
+            return
+        words = record["response"].split(" ")
+        start = time.perf_counter()
+        latency = record.get("latency") or 0.0
+        first_token = record.get("time_to_first_token")
+        if first_token is None:
+            first_token = latency
+        per_token = (latency - first_token) / max(len(words) - 1, 1)
+        for i, word in enumerate(words):
+            if self.timing:
+                wait = start + first_token + per_token * i - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            yield word if i == len(words) - 1 else word + " "
+        self.history.append({"role": "user", "content": prompt})
+        self.history.append({"role": "assistant", "content": record["response"]})
+
+    def stats(self):
+        return {"records": len(self.records), "hits": self.hits, "misses": self.misses}
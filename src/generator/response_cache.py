@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class ResponseCacheMiss(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+class ResponseCache:
+    """
+    On-disk cache of LLM responses in a single SQLite file.
+
+    Entries are keyed by a SHA-256 of ``(model, system prompt, messages)``
+    and store the zlib-compressed response with its size and last use
+    time. Once the compressed responses exceed ``max_bytes`` the least
+    recently used ``evict_fraction`` of that budget is dropped.
+
+    With ``replay=True`` the file is opened read-only: hits are served as
+    usual, misses raise ``ResponseCacheMiss`` instead of calling the API,
+    so a run is guaranteed to need no network.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, replay=False, evict_fraction=0.1):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.replay = replay
+        self.evict_fraction = evict_fraction
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if replay:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No recorded responses at {path} to replay")
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key BLOB PRIMARY KEY, response BLOB NOT NULL, "
+                "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(model, system_prompt, messages):
+        payload = json.dumps(
+            {"model": model, "system": system_prompt, "messages": messages},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).digest()
+
+    def get(self, key, count_miss=True):
+        with self.lock:
+            row = self.conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                if count_miss:
+                    self.misses += 1
+                if self.replay:
+                    raise ResponseCacheMiss("Response not recorded and replay mode forbids API calls")
+                return None
+            self.hits += 1
+            if not self.replay:
+                self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                self.conn.commit()
+            return zlib.decompress(row[0]).decode("utf-8")
+
+    def set(self, key, response):
+        if self.replay:
+            return
+        data = zlib.compress(response.encode("utf-8"))
+        with self.lock:
+            previous = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()),
+            )
+            self.total_bytes += len(data) - (previous[0] if previous else 0)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        target = self.max_bytes * (1 - self.evict_fraction)
+        while self.total_bytes > target:
+            self.conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_used LIMIT 64)"
+            )
+            self.total_bytes = self.conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "replay": self.replay,
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def create_response_cache(config):
+    """Build the ``ResponseCache`` described by ``config["generator"]["response_cache"]``, or None."""
+    cache_config = (config.get("generator") or {}).get("response_cache") or {}
+    if not cache_config.get("enabled", False) and not cache_config.get("replay", False):
+        return None
+    return ResponseCache(
+        cache_config.get("path", "index_store/llm_cache.sqlite"),
+        max_bytes=int(cache_config.get("max_mb", 256) * 1024 * 1024),
+        replay=cache_config.get("replay", False),
+    )
@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+import random
+import time
+
+from generator.base import BaseGenerator
+
+
+class StubGenerator(BaseGenerator):
+    """
+    Offline stand-in for ``GroqModel``: answers with the first line of the
+    retrieved context, so runs need no network access.
+
+    Timing follows a latency profile: the first token arrives after
+    ``latency`` seconds, the next ones at ``tokens_per_second`` (None means
+    all at once). ``jitter`` is the sigma of a log-normal factor applied to
+    both, drawn from an RNG seeded with ``seed`` and the prompt, so the same
+    prompt always gets the same answer and the same latency.
+    ``answer_tokens`` pads or truncates answers to a fixed length.
+    """
+
+    PROFILES = {
+        "instant": {"latency": 0.0, "tokens_per_second": None, "jitter": 0.0},
+        # Roughly llama-3.3-70b-versatile on Groq
+        "groq": {"latency": 0.25, "tokens_per_second": 275.0, "jitter": 0.3},
+        "slow": {"latency": 1.0, "tokens_per_second": 30.0, "jitter": 0.5},
+    }
+
+    def __init__(self, latency=None, tokens_per_second=None, answer_tokens=None, jitter=None,
+                 profile="instant", seed=0):
+        super().__init__()
+        if profile not in self.PROFILES:
+            raise ValueError(f"Unknown stub profile {profile}, expected one of {list(self.PROFILES)}")
+        settings = dict(self.PROFILES[profile])
+        for name, value in (("latency", latency), ("tokens_per_second", tokens_per_second), ("jitter", jitter)):
+            if value is not None:
+                settings[name] = value
+        self.latency = settings["latency"]
+        self.tokens_per_second = settings["tokens_per_second"]
+        self.jitter = settings["jitter"]
+        self.answer_tokens = answer_tokens
+        self.seed = seed
+
+    def _plan(self, prompt):
+        """Answer tokens, time to first token and seconds per further token for ``prompt``."""
+        rng = random.Random(f"{self.seed}:{hashlib.sha1(prompt.encode('utf-8')).hexdigest()}")
+        scale = rng.lognormvariate(0, self.jitter) if self.jitter else 1.0
+        context = prompt.split("Context:", 1)[-1].strip()
+        first_line = context.splitlines()[0] if context else ""
+        tokens = ["[stub]"] + first_line[:200].split()
+        if self.answer_tokens:
+            tokens = (tokens * (self.answer_tokens // len(tokens) + 1))[:self.answer_tokens]
+        per_token = scale / self.tokens_per_second if self.tokens_per_second else 0.0
+        return tokens, self.latency * scale, per_token
+
+    def _delay(self, prompt):
+        tokens, first_token, per_token = self._plan(prompt)
+        return " ".join(tokens), first_token + per_token * (len(tokens) - 1)
+
+    def complete(self, prompt):
+        answer, delay = self._delay(prompt)
+        if delay:
+            time.sleep(delay)
+        return answer
+
+    def stream(self, prompt):
+        tokens, first_token, per_token = self._plan(prompt)
+        start = time.perf_counter()
+        sent = []
+        try:
+            for i, token in enumerate(tokens):
+                # Sleep until the token's scheduled time so pacing does not drift
+                wait = start + first_token + per_token * i - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                sent.append(token)
+                yield token + " "
+        finally:
+            self.history.append({"role": "user", "content": prompt})
+            self.history.append({"role": "assistant", "content": " ".join(sent)})
+
+    async def acomplete(self, prompt):
+        answer, delay = self._delay(prompt)
+        if delay:
+            await asyncio.sleep(delay)
+        return answer
+
+    async def agenerate(self, prompt):
+        answer = await self.acomplete(prompt)
+        self.history.append({"role": "user", "content": prompt})
+        self.history.append({"role": "assistant", "content": answer})
+        return answer
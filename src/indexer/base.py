@@ -0,0 +1,287 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from embedder.huggingface import HuggingFaceEmbedder
+from indexer.manifest import IngestionManifest, chunk_id
+from indexer.bm25 import reciprocal_rank_fusion
+from engine.tracing import get_tracer
+
+
+@dataclass
+class Match:
+    id: str
+    score: float
+    metadata: Dict = field(default_factory=dict)
+
+
+@dataclass
+class QueryResult:
+    """Mirrors the shape of Pinecone's query response (``.matches``)."""
+    matches: List[Match] = field(default_factory=list)
+
+
+@dataclass
+class UpsertPlan:
+    file_source: str
+    chunks: Dict[str, str]
+    new_ids: List[str]
+    stale_ids: List[str]
+
+    @property
+    def new_texts(self):
+        return [self.chunks[id] for id in self.new_ids]
+
+
+class BaseIndex:
+    """
+    Shared ingestion/search logic for every vector index backend.
+
+    Subclasses only implement the storage specific parts:
+    ``create_index``, ``upsert_vectors``, ``delete`` and ``query``.
+
+    When a ``keyword_index`` (``BM25Index``) is attached it is kept in sync
+    on ingestion and ``hybrid_query_many`` fuses its ranking with the dense
+    one using reciprocal rank fusion.
+
+    Writes only change memory (and memory-mapped files); the index metadata,
+    keyword index and manifest are saved when the outermost
+    ``deferred_writes`` block exits or on ``flush``. Outside such a block
+    every write is saved right away.
+    """
+
+    def __init__(self, model_name, dimension, embedding_model=None, manifest_path=None,
+                 keyword_index=None, hybrid_candidates=20, rrf_k=60):
+        self.embedding_model = embedding_model or HuggingFaceEmbedder(model_name)
+        self.dimension = dimension
+        self.manifest = IngestionManifest(manifest_path)
+        self.keyword_index = keyword_index
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        # Bumped on every write so query caches can tell their results are stale:
+        # by the backends' ``upsert_vectors`` / ``delete``, and again once
+        # ``commit_upsert`` / ``remove_sources`` have updated the keyword index
+        self.version = 0
+        # Parts written since the last save ("index", "keyword_index", "manifest")
+        self.unsaved = set()
+        self.deferred_depth = 0
+
+    def create_index(self):
+        raise NotImplementedError
+
+    def upsert_vectors(self, ids, embeddings, metadatas):
+        raise NotImplementedError
+
+    def delete(self, ids):
+        raise NotImplementedError
+
+    def persist(self):
+        """Save the backend's metadata (remote backends write through and have none)."""
+
+    @contextmanager
+    def deferred_writes(self):
+        """
+        Save the index metadata, keyword index and manifest once when the
+        outermost block exits instead of after every write.
+        """
+        self.deferred_depth += 1
+        try:
+            yield self
+        finally:
+            self.deferred_depth -= 1
+            if self.deferred_depth == 0:
+                self.flush()
+
+    def _mark_unsaved(self, *parts):
+        self.unsaved.update(parts)
+        if self.deferred_depth == 0:
+            self.flush()
+
+    def flush(self):
+        """Save everything written since the last save; the manifest goes last."""
+        unsaved, self.unsaved = self.unsaved, set()
+        if "index" in unsaved:
+            self.persist()
+        if "keyword_index" in unsaved and self.keyword_index is not None:
+            self.keyword_index.save()
+        if "manifest" in unsaved:
+            self.manifest.save()
+
+    def query(self, vector, top_k=10) -> QueryResult:
+        raise NotImplementedError
+
+    def query_many(self, vectors, top_k=10, max_workers=8):
+        """
+        Run several queries at once. Backends without a native batch query
+        issue the single queries concurrently.
+        """
+        if len(vectors) <= 1:
+            return [self.query(vector, top_k) for vector in vectors]
+        # Each query runs in a copy of the caller's context so its spans keep their parent
+        contexts = [contextvars.copy_context() for _ in vectors]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(vectors))) as pool:
+            return list(pool.map(
+                lambda context, vector: context.run(self.query, vector, top_k), contexts, vectors
+            ))
+
+    async def aquery(self, vector, top_k=10):
+        """Async ``query``; blocking backends run in the default executor."""
+        return await asyncio.to_thread(self.query, vector, top_k)
+
+    def hybrid_query_many(self, vectors, texts, top_k=10):
+        """
+        Dense query fused with BM25 over ``texts`` when a keyword index is
+        attached, plain ``query_many`` otherwise.
+        """
+        if self.keyword_index is None:
+            return self.query_many(vectors, top_k)
+        candidates = max(top_k, self.hybrid_candidates)
+        results = []
+        for dense, text in zip(self.query_many(vectors, candidates), texts):
+            dense_ranking = [(match.id, match.metadata) for match in dense.matches]
+            with get_tracer().span("keyword_search", top_k=candidates):
+                keyword_ranking = [
+                    (id, metadata) for id, _, metadata in self.keyword_index.search(text, candidates)
+                ]
+            fused = reciprocal_rank_fusion(
+                [dense_ranking, keyword_ranking], top_k, k=self.rrf_k
+            )
+            results.append(QueryResult(matches=[
+                Match(id=id, score=score, metadata=metadata) for id, score, metadata in fused
+            ]))
+        return results
+
+    async def ahybrid_query(self, vector, text, top_k=10):
+        if self.keyword_index is None:
+            return await self.aquery(vector, top_k)
+        results = await asyncio.to_thread(self.hybrid_query_many, [vector], [text], top_k)
+        return results[0]
+
+    def preprocess(self, texts):
+        return [text for text in texts if len(text) > 5]
+
+    def generate_embeddings(self, texts, batch_size=8):
+        texts = self.preprocess(texts)
+        if not texts:
+            return []
+        # One encoder call for all texts: they are segmented together (large
+        # enough inputs go to the segmenter's process pool) and the model
+        # still runs in batches of ``batch_size``
+        return list(self.embedding_model.encode(texts, batch_size=batch_size))
+
+    def plan_upsert(self, texts, file_source):
+        """
+        Compare the chunks of one source file against the manifest.
+
+        :param texts: Chunks of the file.
+        :param file_source: Path of the source file.
+        :return: ``UpsertPlan`` with the chunks to embed and the ids to delete.
+        """
+        chunks = {}
+        for text in self.preprocess(texts):
+            chunks.setdefault(chunk_id(file_source, text), text)
+
+        known_ids = set(self.manifest.chunk_ids(file_source))
+        return UpsertPlan(
+            file_source=str(file_source),
+            chunks=chunks,
+            new_ids=[id for id in chunks if id not in known_ids],
+            stale_ids=[id for id in known_ids if id not in chunks],
+        )
+
+    def commit_upsert(self, plan, embeddings, digest=None):
+        """
+        Write the embeddings of ``plan.new_ids``, delete ``plan.stale_ids``
+        and record the file in the manifest.
+
+        :param digest: Optional content hash of the file, stored in the manifest.
+        :return: Dict with the number of added, removed and unchanged chunks.
+        """
+        with self.deferred_writes():
+            if plan.new_ids:
+                metadatas = [
+                    {"text": text, "file_source": plan.file_source} for text in plan.new_texts
+                ]
+                self.upsert_vectors(plan.new_ids, embeddings, metadatas)
+            if plan.stale_ids:
+                self.delete(plan.stale_ids)
+            if self.keyword_index is not None:
+                self._sync_keyword_index(plan)
+            if plan.new_ids or plan.stale_ids:
+                self.version += 1
+
+            self.manifest.update(plan.file_source, plan.chunks.keys(), digest=digest)
+            self._mark_unsaved("manifest")
+        return {
+            "added": len(plan.new_ids),
+            "removed": len(plan.stale_ids),
+            "unchanged": len(plan.chunks) - len(plan.new_ids),
+        }
+
+    def _sync_keyword_index(self, plan):
+        # Also backfills chunks ingested before the keyword index existed
+        missing_ids = [id for id in plan.chunks if id not in self.keyword_index]
+        if missing_ids:
+            self.keyword_index.add(
+                missing_ids,
+                [plan.chunks[id] for id in missing_ids],
+                [{"text": plan.chunks[id], "file_source": plan.file_source} for id in missing_ids],
+            )
+        if plan.stale_ids:
+            self.keyword_index.delete(plan.stale_ids)
+        if missing_ids or plan.stale_ids:
+            self._mark_unsaved("keyword_index")
+
+    def is_up_to_date(self, file_source, digest):
+        """True when ``file_source`` was ingested with this digest (and into the keyword index)."""
+        if self.manifest.digest(file_source) != digest:
+            return False
+        if self.keyword_index is None:
+            return True
+        return all(id in self.keyword_index for id in self.manifest.chunk_ids(file_source))
+
+    def upsert_texts(self, texts, file_source, digest=None):
+        """
+        Incrementally index the chunks of one source file.
+
+        Only chunks missing from the manifest are embedded and upserted; chunks
+        the manifest knows about but that are no longer present get deleted.
+
+        :param texts: Chunks of the file.
+        :param file_source: Path of the source file.
+        :param digest: Optional content hash of the file, stored in the manifest.
+        :return: Dict with the number of added, removed and unchanged chunks.
+        """
+        plan = self.plan_upsert(texts, file_source)
+        embeddings = self.generate_embeddings(plan.new_texts) if plan.new_ids else []
+        return self.commit_upsert(plan, embeddings, digest=digest)
+
+    def remove_sources(self, keep_sources):
+        """
+        Delete every chunk of the sources that are not in ``keep_sources``.
+
+        :return: Number of deleted chunks.
+        """
+        keep_sources = {str(source) for source in keep_sources}
+        removed = 0
+        with self.deferred_writes():
+            for source in list(self.manifest.sources):
+                if source not in keep_sources:
+                    ids = self.manifest.remove(source)
+                    self._mark_unsaved("manifest")
+                    if ids:
+                        self.delete(ids)
+                        if self.keyword_index is not None:
+                            self.keyword_index.delete(ids)
+                            self._mark_unsaved("keyword_index")
+                    removed += len(ids)
+            if removed:
+                self.version += 1
+        return removed
+
+    def search(self, query, top_k=10):
+        query_embedding = self.embedding_model.encode([query])[0]
+        return self.query(query_embedding, top_k)
@@ -0,0 +1,186 @@
+import json
+import os
+from collections import Counter
+
+import numpy as np
+
+
+def tokenize(text):
+    """Same normalization and stop words as the crawler (``data.crawl``)."""
+    from data.crawl import clean_and_process_text
+
+    return (clean_and_process_text(text) or "").split()
+
+
+class BM25Index:
+    """
+    Okapi BM25 keyword index over chunk texts.
+
+    Postings are kept in CSR form: ``offsets[t]:offsets[t + 1]`` slices
+    ``doc_idx`` / ``tf`` for term ``t``. The arrays are saved as a single npz
+    next to a JSON file with the vocabulary, chunk ids and metadata, so
+    loading is a couple of reads with no re-tokenization.
+
+    Adds and deletes work on per-document term counters that are rebuilt
+    from the postings on the first write; the arrays are recompiled lazily
+    before the next search or save.
+    """
+
+    def __init__(self, path, k1=1.5, b=0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.ids = []
+        self.metadatas = []
+        self.terms = {}
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.doc_idx = np.zeros(0, dtype=np.int32)
+        self.tf = np.zeros(0, dtype=np.float32)
+        self.doc_len = np.zeros(0, dtype=np.float32)
+        self.id_set = set()
+        self.doc_terms = None
+        self.dirty = False
+        self.load()
+
+    @property
+    def arrays_path(self):
+        return os.path.join(self.path, "bm25.npz")
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.path, "bm25.json")
+
+    def load(self):
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = np.load(self.arrays_path)
+        self.ids = meta["ids"]
+        self.id_set = set(self.ids)
+        self.metadatas = meta["metadata"]
+        self.terms = {term: i for i, term in enumerate(meta["terms"])}
+        self.offsets = arrays["offsets"]
+        self.doc_idx = arrays["doc_idx"]
+        self.tf = arrays["tf"]
+        self.doc_len = arrays["doc_len"]
+
+    def save(self):
+        self._compile()
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = os.path.join(self.path, "bm25.tmp.npz")
+        np.savez(
+            tmp_path,
+            offsets=self.offsets,
+            doc_idx=self.doc_idx,
+            tf=self.tf,
+            doc_len=self.doc_len,
+        )
+        os.replace(tmp_path, self.arrays_path)
+        terms = sorted(self.terms, key=self.terms.get)
+        with open(self.meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(
+                {"ids": self.ids, "metadata": self.metadatas, "terms": terms},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+
+    def __len__(self):
+        return len(self.doc_terms) if self.doc_terms is not None else len(self.ids)
+
+    def __contains__(self, id):
+        if self.doc_terms is not None:
+            return id in self.doc_terms
+        return id in self.id_set
+
+    def _materialize(self):
+        """Rebuild per-document term counters from the postings."""
+        if self.doc_terms is not None:
+            return
+        vocabulary = sorted(self.terms, key=self.terms.get)
+        doc_terms = {id: (metadata, Counter()) for id, metadata in zip(self.ids, self.metadatas)}
+        for term_idx, term in enumerate(vocabulary):
+            start, end = self.offsets[term_idx], self.offsets[term_idx + 1]
+            for doc, tf in zip(self.doc_idx[start:end], self.tf[start:end]):
+                doc_terms[self.ids[doc]][1][term] = int(tf)
+        self.doc_terms = doc_terms
+
+    def add(self, ids, texts, metadatas):
+        self._materialize()
+        for id, text, metadata in zip(ids, texts, metadatas):
+            self.doc_terms[id] = (metadata, Counter(tokenize(text)))
+        self.dirty = True
+
+    def delete(self, ids):
+        self._materialize()
+        for id in ids:
+            self.doc_terms.pop(id, None)
+        self.dirty = True
+
+    def _compile(self):
+        if not self.dirty:
+            return
+        self.ids = list(self.doc_terms)
+        self.id_set = set(self.ids)
+        self.metadatas = [metadata for metadata, _ in self.doc_terms.values()]
+        postings = {}
+        doc_len = np.zeros(len(self.ids), dtype=np.float32)
+        for doc, (_, counts) in enumerate(self.doc_terms.values()):
+            doc_len[doc] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc, tf))
+        self.terms = {term: i for i, term in enumerate(postings)}
+        lengths = [len(entries) for entries in postings.values()]
+        self.offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.offsets[1:])
+        entries = [entry for term_entries in postings.values() for entry in term_entries]
+        self.doc_idx = np.array([doc for doc, _ in entries], dtype=np.int32)
+        self.tf = np.array([tf for _, tf in entries], dtype=np.float32)
+        self.doc_len = doc_len
+        self.dirty = False
+
+    def search(self, query, top_k=10):
+        """
+        :return: List of ``(id, score, metadata)`` sorted by BM25 score.
+        """
+        self._compile()
+        num_docs = len(self.ids)
+        if num_docs == 0 or top_k <= 0:
+            return []
+        avg_len = float(self.doc_len.mean()) or 1.0
+        scores = np.zeros(num_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_idx = self.terms.get(term)
+            if term_idx is None:
+                continue
+            start, end = self.offsets[term_idx], self.offsets[term_idx + 1]
+            docs, tf = self.doc_idx[start:end], self.tf[start:end]
+            idf = np.log(1 + (num_docs - (end - start) + 0.5) / ((end - start) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[docs] / avg_len)
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        hits = np.flatnonzero(scores)
+        if len(hits) == 0:
+            return []
+        top_k = min(top_k, len(hits))
+        top = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[doc], float(scores[doc]), self.metadatas[doc]) for doc in top]
+
+
+def reciprocal_rank_fusion(rankings, top_k, k=60):
+    """
+    Fuse several rankings with RRF: ``score(d) = sum(1 / (k + rank(d)))``.
+
+    :param rankings: Lists of ``(id, metadata)`` in rank order.
+    :return: List of ``(id, fused_score, metadata)``, best first.
+    """
+    scores = {}
+    metadatas = {}
+    for ranking in rankings:
+        for rank, (id, metadata) in enumerate(ranking, start=1):
+            scores[id] = scores.get(id, 0.0) + 1.0 / (k + rank)
+            metadatas.setdefault(id, metadata)
+    best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [(id, scores[id], metadatas[id]) for id in best]
@@ -0,0 +1,92 @@
+def create_embedder(config):
+    """
+    Build the query/document embedder, with the on-disk embedding cache
+    when ``embedding_cache.enabled`` is set in config.yaml.
+    """
+    from embedder.huggingface import HuggingFaceEmbedder
+    from embedder.segmentation import Segmenter
+
+    cache_config = config.get("embedding_cache") or {}
+    cache = None
+    if cache_config.get("enabled"):
+        from embedder.cache import EmbeddingCache
+        cache = EmbeddingCache(
+            path=cache_config.get("path", "index_store/embedding_cache"),
+            max_entries=cache_config.get("max_entries", 100_000),
+        )
+    segmentation_config = config.get("segmentation") or {}
+    segmenter = Segmenter(
+        memo_size=segmentation_config.get("memo_size", 4096),
+        workers=segmentation_config.get("workers"),
+        parallel_threshold=segmentation_config.get("parallel_threshold", 64),
+        parallel_min_chars=segmentation_config.get("parallel_min_chars", 8000),
+    )
+    return HuggingFaceEmbedder(config["pinecone"]["model_name"], cache=cache, segmenter=segmenter)
+
+
+def create_indexer(config, embedding_model=None):
+    """
+    Build the vector index selected by ``indexer.backend`` in config.yaml.
+
+    :param config: Parsed config.yaml.
+    :param embedding_model: Optional embedder shared with other components.
+    :return: A ``PineconeIndex``, ``LocalIndex`` or ``IVFIndex``.
+    """
+    pinecone_config = config.get("pinecone")
+    indexer_config = config.get("indexer") or {}
+    backend = indexer_config.get("backend", "pinecone")
+    embedding_model = embedding_model or create_embedder(config)
+    hybrid_config = config.get("hybrid") or {}
+    hybrid_options = {}
+    if hybrid_config.get("enabled"):
+        from indexer.bm25 import BM25Index
+        hybrid_options = {
+            "keyword_index": BM25Index(
+                hybrid_config.get("path", f"index_store/{pinecone_config['index_name']}.bm25")
+            ),
+            "hybrid_candidates": hybrid_config.get("candidates", 20),
+            "rrf_k": hybrid_config.get("rrf_k", 60),
+        }
+
+    if backend == "pinecone":
+        from indexer.pinecone import PineconeIndex
+        return PineconeIndex(
+            index_name=pinecone_config["index_name"],
+            model_name=pinecone_config["model_name"],
+            dimension=pinecone_config["dimension"],
+            embedding_model=embedding_model,
+            manifest_path=indexer_config.get(
+                "manifest_path", f"index_store/{pinecone_config['index_name']}.manifest.json"
+            ),
+            **hybrid_options,
+        )
+    if backend == "local":
+        from indexer.local import LocalIndex
+        return LocalIndex(
+            index_name=pinecone_config["index_name"],
+            model_name=pinecone_config["model_name"],
+            dimension=pinecone_config["dimension"],
+            path=indexer_config.get("path", f"index_store/{pinecone_config['index_name']}"),
+            embedding_model=embedding_model,
+            manifest_path=indexer_config.get("manifest_path"),
+            quantization=indexer_config.get("quantization", "none"),
+            rescore_factor=indexer_config.get("rescore_factor", 4),
+            **hybrid_options,
+        )
+    if backend == "ivf":
+        from indexer.ivf import IVFIndex
+        ivf_config = indexer_config.get("ivf") or {}
+        return IVFIndex(
+            index_name=pinecone_config["index_name"],
+            model_name=pinecone_config["model_name"],
+            dimension=pinecone_config["dimension"],
+            path=indexer_config.get("path", f"index_store/{pinecone_config['index_name']}"),
+            embedding_model=embedding_model,
+            manifest_path=indexer_config.get("manifest_path"),
+            nlist=ivf_config.get("nlist", 256),
+            nprobe=ivf_config.get("nprobe", 8),
+            train_iterations=ivf_config.get("train_iterations", 20),
+            train_size=ivf_config.get("train_size"),
+            **hybrid_options,
+        )
+    raise ValueError(f"Unknown indexer backend: {backend}")
@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+
+from indexer.base import Match, QueryResult
+from indexer.local import LocalIndex
+
+
+class IVFIndex(LocalIndex):
+    """
+    Approximate nearest-neighbour ``LocalIndex`` (IVF-flat).
+
+    Vectors are partitioned into ``nlist`` clusters by spherical k-means;
+    a query only scores the vectors of its ``nprobe`` closest clusters.
+    Until ``train_size`` vectors have been inserted the index behaves like
+    the exact ``LocalIndex``; it then trains itself once, and later inserts
+    are assigned to their nearest centroid without retraining (call
+    ``train()`` again after large corpus changes).
+
+    Extra files in ``path``:
+        centroids.npy - ``nlist x dimension`` unit-norm centroids
+        lists.i32     - cluster id of every row
+    """
+
+    CENTROIDS_FILE = "centroids.npy"
+
+    def __init__(self, index_name, model_name, dimension, path, nlist=256, nprobe=8,
+                 train_iterations=20, train_size=None, seed=0, **kwargs):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iterations = train_iterations
+        # Enough points per centroid for k-means to be meaningful
+        self.train_size = train_size or nlist * 39
+        self.seed = seed
+        self.centroids = None
+        self.lists = None
+        super().__init__(index_name, model_name, dimension, path, **kwargs)
+        centroids_path = os.path.join(self.path, self.CENTROIDS_FILE)
+        if os.path.exists(centroids_path):
+            self.centroids = np.load(centroids_path)
+
+    def _open_vectors(self, capacity):
+        super()._open_vectors(capacity)
+        self.assignments = self._open_matrix("lists.i32", np.int32, (self.capacity,))
+        self.lists = None
+
+    def _flush(self):
+        super()._flush()
+        self.assignments.flush()
+
+    def _write_row_data(self, rows, embeddings):
+        super()._write_row_data(rows, embeddings)
+        if self.centroids is not None:
+            self.assignments[rows] = self._nearest_centroids(embeddings)
+            self.lists = None
+
+    def _move_row(self, source, target):
+        super()._move_row(source, target)
+        self.assignments[target] = self.assignments[source]
+        self.lists = None
+
+    def delete(self, ids):
+        super().delete(ids)
+        # Deleting the last row moves nothing, but the lists still hold its row number
+        self.lists = None
+
+    def upsert_vectors(self, ids, embeddings, metadatas):
+        super().upsert_vectors(ids, embeddings, metadatas)
+        if self.centroids is None and len(self.ids) >= self.train_size:
+            self.train()
+
+    def _nearest_centroids(self, vectors, block_size=16384):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block_size):
+            block = vectors[start:start + block_size]
+            assignments[start:start + block_size] = np.argmax(block @ self.centroids.T, axis=1)
+        return assignments
+
+    def train(self, sample_size=None):
+        """
+        Fit the centroids with spherical k-means on (a sample of) the stored
+        vectors and reassign every row.
+        """
+        count = len(self.ids)
+        nlist = min(self.nlist, count)
+        if nlist == 0:
+            return
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(count, sample_size or max(self.train_size, nlist * 64))
+        sample = np.array(self.vectors[np.sort(rng.choice(count, sample_size, replace=False))])
+
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)]
+        for _ in range(self.train_iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            empty = np.flatnonzero(np.bincount(assignments, minlength=nlist) == 0)
+            # Reseed empty clusters with random points
+            sums[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+            centroids = self._normalize(sums)
+
+        self.centroids = centroids.astype(np.float32)
+        np.save(os.path.join(self.path, self.CENTROIDS_FILE), self.centroids)
+        self.assignments[:count] = self._nearest_centroids(self.vectors[:count])
+        self.lists = None
+        self.persist()
+
+    def _inverted_lists(self):
+        """CSR view of the clusters: rows of list ``c`` are ``order[offsets[c]:offsets[c + 1]]``."""
+        if self.lists is None:
+            assignments = np.asarray(self.assignments[:len(self.ids)])
+            order = np.argsort(assignments, kind="stable").astype(np.int64)
+            offsets = np.zeros(len(self.centroids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(assignments, minlength=len(self.centroids)), out=offsets[1:])
+            self.lists = (order, offsets)
+        return self.lists
+
+    def query_many(self, vectors, top_k=10, max_workers=None):
+        if self.centroids is None or len(self.ids) == 0 or top_k <= 0:
+            return super().query_many(vectors, top_k)
+        queries = self._normalize(np.asarray(vectors).reshape(len(vectors), -1))
+        order, offsets = self._inverted_lists()
+        nprobe = min(self.nprobe, len(self.centroids))
+        probes, _ = self._top_rows(queries @ self.centroids.T, nprobe)
+
+        results = []
+        for query, clusters in zip(queries, probes):
+            rows = np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in clusters]))
+            if len(rows) == 0:
+                results.append(QueryResult())
+                continue
+            rows_top, scores = self._top_rows(self.vectors[rows] @ query, min(top_k, len(rows)))
+            results.append(QueryResult(matches=[
+                Match(id=self.ids[row], score=float(score), metadata=self.metadatas[row])
+                for row, score in zip(rows[rows_top], scores)
+            ]))
+        return results
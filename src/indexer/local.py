@@ -0,0 +1,239 @@
+import json
+import os
+
+import numpy as np
+
+from indexer.base import BaseIndex, Match, QueryResult
+from indexer.quantization import binary_scores, int8_scores, quantize_binary, quantize_int8
+
+
+class LocalIndex(BaseIndex):
+    """
+    Offline vector index backed by a memory-mapped float32 matrix.
+
+    Vectors are L2-normalised on insert so a single matmul against the
+    normalised query gives cosine scores (the metric Pinecone uses by default).
+
+    With ``quantization="int8"`` or ``"binary"`` a compact code of every
+    vector is kept as well. Queries first scan the codes (int8 dot products
+    or Hamming distances), then rescore the best ``top_k * rescore_factor``
+    rows exactly against the float vectors, so only the codes and a small
+    shortlist of float rows are read per query.
+
+    Layout of ``path``:
+        vectors.f32  - row-major float32 matrix, ``capacity x dimension``
+        codes.i8 / scales.f32 - int8 codes and per-row scales (int8 mode)
+        codes.bin    - packed sign bits, ``capacity x dimension / 8`` (binary mode)
+        meta.json    - dimension, quantization, ids and per-row metadata
+        manifest.json - ingestion manifest (unless ``manifest_path`` is given)
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    META_FILE = "meta.json"
+    QUANTIZATION_MODES = ("none", "int8", "binary")
+
+    def __init__(self, index_name, model_name, dimension, path, embedding_model=None,
+                 manifest_path=None, quantization="none", rescore_factor=4, **kwargs):
+        if quantization not in self.QUANTIZATION_MODES:
+            raise ValueError(
+                f"Unknown quantization {quantization}, expected one of {self.QUANTIZATION_MODES}"
+            )
+        super().__init__(
+            model_name,
+            dimension,
+            embedding_model=embedding_model,
+            manifest_path=manifest_path or os.path.join(path, "manifest.json"),
+            **kwargs,
+        )
+        self.index_name = index_name
+        self.path = path
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.create_index()
+
+    @property
+    def vectors_path(self):
+        return os.path.join(self.path, self.VECTORS_FILE)
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.path, self.META_FILE)
+
+    def create_index(self):
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(self.meta_path):
+            print(f"Index {self.index_name} already exists.")
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["dimension"] != self.dimension:
+                raise ValueError(
+                    f"Index {self.index_name} has dimension {meta['dimension']}, "
+                    f"expected {self.dimension}."
+                )
+            self.ids = meta["ids"]
+            self.metadatas = meta["metadata"]
+            stored_quantization = meta.get("quantization", "none")
+        else:
+            self.ids = []
+            self.metadatas = []
+            stored_quantization = self.quantization
+        self.id_to_row = {id: row for row, id in enumerate(self.ids)}
+        self._open_vectors(max(len(self.ids), 1))
+        if self.quantization != stored_quantization:
+            # Quantization mode changed: derive the codes from the float vectors
+            self._write_row_data(np.arange(len(self.ids)), self.vectors[:len(self.ids)])
+            self.persist()
+
+    def _open_matrix(self, name, dtype, shape):
+        path = os.path.join(self.path, name)
+        with open(path, "ab") as f:
+            f.truncate(int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _open_vectors(self, capacity):
+        row_bytes = self.dimension * np.dtype(np.float32).itemsize
+        if os.path.exists(self.vectors_path):
+            capacity = max(capacity, os.path.getsize(self.vectors_path) // row_bytes)
+        self.capacity = capacity
+        self.vectors = self._open_matrix(self.VECTORS_FILE, np.float32, (capacity, self.dimension))
+        self.codes = None
+        self.scales = None
+        if self.quantization == "int8":
+            self.codes = self._open_matrix("codes.i8", np.int8, (capacity, self.dimension))
+            self.scales = self._open_matrix("scales.f32", np.float32, (capacity,))
+        elif self.quantization == "binary":
+            width = (self.dimension + 7) // 8
+            self.codes = self._open_matrix("codes.bin", np.uint8, (capacity, width))
+
+    def _flush(self):
+        for matrix in (self.vectors, self.codes, self.scales):
+            if matrix is not None:
+                matrix.flush()
+
+    def _reserve(self, count):
+        if count <= self.capacity:
+            return
+        self._flush()
+        self._open_vectors(max(count, self.capacity * 2))
+
+    def _write_row_data(self, rows, embeddings):
+        """Derive per-row data (quantized codes) from freshly written vectors."""
+        if self.quantization == "int8":
+            self.codes[rows], self.scales[rows] = quantize_int8(embeddings)
+        elif self.quantization == "binary":
+            self.codes[rows] = quantize_binary(embeddings)
+
+    @staticmethod
+    def _normalize(matrix):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def __len__(self):
+        return len(self.ids)
+
+    def upsert_vectors(self, ids, embeddings, metadatas):
+        if not ids:
+            return
+        embeddings = self._normalize(embeddings)
+        self._reserve(len(self.ids) + len(ids))
+        for id, embedding, metadata in zip(ids, embeddings, metadatas):
+            row = self.id_to_row.get(id)
+            if row is None:
+                row = len(self.ids)
+                self.ids.append(id)
+                self.metadatas.append(metadata)
+                self.id_to_row[id] = row
+            else:
+                self.metadatas[row] = metadata
+            self.vectors[row] = embedding
+        self._write_row_data([self.id_to_row[id] for id in ids], embeddings)
+        self._mark_unsaved("index")
+        self.version += 1
+
+    def delete(self, ids):
+        for id in ids:
+            row = self.id_to_row.pop(id, None)
+            if row is None:
+                continue
+            last = len(self.ids) - 1
+            if row != last:
+                # Move the last row into the hole to keep the matrix dense
+                moved_id = self.ids[last]
+                self._move_row(last, row)
+                self.ids[row] = moved_id
+                self.metadatas[row] = self.metadatas[last]
+                self.id_to_row[moved_id] = row
+            self.ids.pop()
+            self.metadatas.pop()
+        self._mark_unsaved("index")
+        self.version += 1
+
+    def _move_row(self, source, target):
+        for matrix in (self.vectors, self.codes, self.scales):
+            if matrix is not None:
+                matrix[target] = matrix[source]
+
+    def persist(self):
+        self._flush()
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "dimension": self.dimension,
+                    "quantization": self.quantization,
+                    "ids": self.ids,
+                    "metadata": self.metadatas,
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, self.meta_path)
+
+    def query(self, vector, top_k=10):
+        return self.query_many([vector], top_k)[0]
+
+    @staticmethod
+    def _top_rows(scores, top_k):
+        """Indices and scores of the ``top_k`` best entries of every row, best first."""
+        top = np.argpartition(-scores, top_k - 1, axis=-1)[..., :top_k]
+        top_scores = np.take_along_axis(scores, top, axis=-1)
+        order = np.argsort(-top_scores, axis=-1)
+        return np.take_along_axis(top, order, axis=-1), np.take_along_axis(top_scores, order, axis=-1)
+
+    def _approximate_scores(self, queries, count):
+        if self.quantization == "int8":
+            return int8_scores(self.codes[:count], self.scales[:count], queries)
+        return binary_scores(self.codes[:count], queries)
+
+    def query_many(self, vectors, top_k=10, max_workers=None):
+        """
+        Score every query against the whole matrix with a single matmul, or,
+        when quantized, against the codes followed by exact rescoring.
+        """
+        count = len(self.ids)
+        if count == 0 or top_k <= 0:
+            return [QueryResult() for _ in vectors]
+        queries = self._normalize(np.asarray(vectors).reshape(len(vectors), -1))
+        top_k = min(top_k, count)
+
+        if self.quantization == "none":
+            top, top_scores = self._top_rows(queries @ self.vectors[:count].T, top_k)
+        else:
+            shortlist_size = min(count, top_k * self.rescore_factor)
+            shortlist, _ = self._top_rows(self._approximate_scores(queries, count), shortlist_size)
+            top, top_scores = [], []
+            for query, rows in zip(queries, shortlist):
+                rows = np.sort(rows)
+                rows_top, rows_scores = self._top_rows(self.vectors[rows] @ query, top_k)
+                top.append(rows[rows_top])
+                top_scores.append(rows_scores)
+
+        return [
+            QueryResult(matches=[
+                Match(id=self.ids[row], score=float(score), metadata=self.metadatas[row])
+                for row, score in zip(rows, row_scores)
+            ])
+            for rows, row_scores in zip(top, top_scores)
+        ]
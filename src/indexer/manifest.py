@@ -0,0 +1,60 @@
+import hashlib
+import json
+import os
+
+
+def chunk_id(file_source, text):
+    """
+    Stable, ASCII-only id for a chunk: hash of its source file + hash of its text.
+    The same chunk of the same file always maps to the same vector id.
+    """
+    source_hash = hashlib.sha1(str(file_source).encode("utf-8")).hexdigest()[:12]
+    text_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()[:20]
+    return f"{source_hash}-{text_hash}"
+
+
+def file_digest(path):
+    hasher = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class IngestionManifest:
+    """
+    Records which chunk ids were ingested for every source file, so re-runs
+    only embed new chunks and delete the ones that disappeared.
+
+    Without a ``path`` the manifest lives in memory only.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.sources = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.sources = json.load(f).get("sources", {})
+
+    def chunk_ids(self, file_source):
+        return self.sources.get(str(file_source), {}).get("ids", [])
+
+    def digest(self, file_source):
+        return self.sources.get(str(file_source), {}).get("digest")
+
+    def update(self, file_source, ids, digest=None):
+        self.sources[str(file_source)] = {"digest": digest, "ids": list(ids)}
+
+    def remove(self, file_source):
+        return self.sources.pop(str(file_source), {}).get("ids", [])
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "sources": self.sources}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -1,25 +1,51 @@
-from pinecone import Pinecone
-from pinecone import ServerlessSpec
 import os
+import threading
 from dotenv import load_dotenv
-from embedder.huggingface import HuggingFaceEmbedder
+from indexer.base import BaseIndex
+from engine.tracing import get_tracer
 
 load_dotenv()
 
-class PineconeIndex:
-    def __init__(self, index_name, model_name, dimension):
+class PineconeIndex(BaseIndex):
+    def __init__(self, index_name, model_name, dimension, embedding_model=None, manifest_path=None,
+                 **kwargs):
         self.api_key = os.getenv("PINECONE_API_KEY")
 
         if not all([self.api_key]):
             raise ValueError("Please set PINECONE_API_KEY in your .env file.")
 
-        self.pinecone = Pinecone(api_key=self.api_key)
+        super().__init__(
+            model_name,
+            dimension,
+            embedding_model=embedding_model,
+            manifest_path=manifest_path,
+            **kwargs,
+        )
         self.index_name = index_name
-        self.embedding_model = HuggingFaceEmbedder(model_name)
-        self.dimension = dimension
-        self.create_index()
+        self._pinecone = None
+        self._index = None
+        self.connect_lock = threading.Lock()
+
+    @property
+    def pinecone(self):
+        if self._pinecone is None:
+            from pinecone import Pinecone
+            self._pinecone = Pinecone(api_key=self.api_key)
+        return self._pinecone
+
+    @property
+    def index(self):
+        # Connected (and created if missing) on first use, so building the
+        # indexer costs no network round trip
+        if self._index is None:
+            with self.connect_lock:
+                if self._index is None:
+                    self.create_index()
+        return self._index
 
     def create_index(self):
+        from pinecone import ServerlessSpec
+
         if not self.pinecone.has_index(self.index_name):
             self.pinecone.create_index(
                 name=self.index_name,
@@ -36,46 +62,37 @@ class PineconeIndex:
             )
         else:
             print(f"Index {self.index_name} already exists.")
-        self.index = self.pinecone.Index(self.index_name)
-
-    def preprocess(self, texts):
-        return [text for text in texts if len(text) > 5]
+        self._index = self.pinecone.Index(self.index_name)
 
-    def generate_embeddings(self, texts, batch_size=8):
-        texts = self.preprocess(texts)
-        embeddings = []
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            embeddings.extend(self.embedding_model.encode(batch))
-        return embeddings
-    
-    def upsert_texts(self, texts, file_source):
-        texts = self.preprocess(texts)
-        embeddings = self.generate_embeddings(texts)
-        ids = [f"_{i}" for i in range(len(texts))]
-        for i in range(0, len(texts), 100):
-            batch_ids = ids[i:i + 100]
-            batch_embeddings = embeddings[i:i + 100]
+    def upsert_vectors(self, ids, embeddings, metadatas):
+        for i in range(0, len(ids), 100):
             self.index.upsert(
                 vectors=[
                     {
                         "id": id,
-                        "values": embedding,
-                        "metadata": {
-                            "text": text,
-                            "file_source": str(file_source),
-                        }
+                        "values": list(map(float, embedding)),
+                        "metadata": metadata,
                     }
-                    for id, embedding, text in zip(batch_ids, batch_embeddings, texts[i:i + 100])
+                    for id, embedding, metadata in zip(
+                        ids[i:i + 100], embeddings[i:i + 100], metadatas[i:i + 100]
+                    )
                 ],
             )
-        
-    def search(self, query, top_k=10):
-        query_embedding = self.embedding_model.encode([query])[0]
-        results = self.index.query(
-            vector=query_embedding.tolist(),
-            top_k=top_k,
-            include_metadata=True,
-            include_values=False,
-        )
-        return results
\ No newline at end of file
+        self.version += 1
+
+    def delete(self, ids):
+        ids = list(ids)
+        for i in range(0, len(ids), 1000):
+            self.index.delete(ids=ids[i:i + 1000])
+        self.version += 1
+
+    def query(self, vector, top_k=10):
+        with get_tracer().span("pinecone.query", index=self.index_name, top_k=top_k) as span:
+            results = self.index.query(
+                vector=list(map(float, vector)),
+                top_k=top_k,
+                include_metadata=True,
+                include_values=False,
+            )
+            span.set("matches", len(results.matches or []))
+        return results
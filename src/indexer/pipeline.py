@@ -0,0 +1,166 @@
+import json
+import queue
+import threading
+import time
+
+from tqdm import tqdm
+
+from indexer.manifest import file_digest
+
+_DONE = object()
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.chunks = 0
+        self.busy_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "files": self.items,
+            "chunks": self.chunks,
+            "busy_seconds": self.busy_seconds,
+            "files_per_second": self.items / self.busy_seconds if self.busy_seconds else 0.0,
+            "chunks_per_second": self.chunks / self.busy_seconds if self.busy_seconds else 0.0,
+        }
+
+
+class IngestionPipeline:
+    """
+    Ingest wiki JSON files with read, chunk, embed and upsert running as
+    concurrent threads linked by bounded queues.
+
+    A full queue blocks the stage feeding it (backpressure), so memory stays
+    bounded and the total time tends to the time of the slowest stage
+    instead of the sum of all stages. Files whose digest matches the
+    manifest are skipped in the read stage. The index metadata, keyword
+    index and manifest are saved every ``flush_every`` files and at the end
+    of the run rather than after every file.
+    """
+
+    STAGES = ("read", "chunk", "embed", "upsert")
+
+    def __init__(self, indexer, chunker, queue_size=4, embed_batch_size=32, flush_every=200):
+        """
+        :param indexer: Index derived from ``BaseIndex``.
+        :param chunker: Function mapping a list of paragraphs to chunks.
+        :param queue_size: Max files waiting between two stages.
+        :param embed_batch_size: Texts per encoder call in the embed stage.
+        :param flush_every: Upserted files between two saves of the index metadata.
+        """
+        self.indexer = indexer
+        self.chunker = chunker
+        self.queue_size = queue_size
+        self.embed_batch_size = embed_batch_size
+        self.flush_every = flush_every
+
+    def run(self, files):
+        """
+        :param files: Paths of the wiki JSON files.
+        :return: Dict with ingestion counts and per-stage throughput.
+        """
+        self.stop = threading.Event()
+        self.errors = []
+        self.stats = {name: StageStats(name) for name in self.STAGES}
+        self.totals = {"added": 0, "removed": 0, "unchanged": 0, "skipped_files": 0}
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.STAGES[1:]]
+        self.progress = tqdm(total=len(files), desc="Ingesting files", unit="file")
+
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._run_stage, args=(self._read, "read", iter(files), queues[0])),
+            threading.Thread(target=self._run_stage, args=(self._chunk, "chunk", queues[0], queues[1])),
+            threading.Thread(target=self._run_stage, args=(self._embed, "embed", queues[1], queues[2])),
+            threading.Thread(target=self._run_stage, args=(self._upsert, "upsert", queues[2], None)),
+        ]
+        with self.indexer.deferred_writes():
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.progress.close()
+        if self.errors:
+            raise self.errors[0]
+
+        return {
+            **self.totals,
+            "wall_seconds": time.perf_counter() - start,
+            "stages": {name: stats.as_dict() for name, stats in self.stats.items()},
+        }
+
+    def _put(self, output, item):
+        while not self.stop.is_set():
+            try:
+                output.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _items(self, source):
+        if not isinstance(source, queue.Queue):
+            yield from source
+            return
+        while not self.stop.is_set():
+            try:
+                item = source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return
+            yield item
+
+    def _run_stage(self, work, name, source, output):
+        stats = self.stats[name]
+        try:
+            for item in self._items(source):
+                if self.stop.is_set():
+                    break
+                start = time.perf_counter()
+                result = work(item)
+                stats.busy_seconds += time.perf_counter() - start
+                if result is None:
+                    continue
+                stats.items += 1
+                stats.chunks += len(result.get("plan").new_ids) if result.get("plan") else 0
+                if output is not None:
+                    self._put(output, result)
+        except Exception as e:
+            self.errors.append(e)
+            self.stop.set()
+        finally:
+            if output is not None:
+                self._put(output, _DONE)
+
+    def _read(self, path):
+        digest = file_digest(path)
+        if self.indexer.is_up_to_date(path, digest):
+            self.totals["skipped_files"] += 1
+            self.progress.update(1)
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {"path": path, "digest": digest, "paragraphs": data["raw_content"]["content"]}
+
+    def _chunk(self, item):
+        texts = self.chunker(item.pop("paragraphs"))
+        item["plan"] = self.indexer.plan_upsert(texts, file_source=item["path"])
+        return item
+
+    def _embed(self, item):
+        plan = item["plan"]
+        item["embeddings"] = (
+            self.indexer.generate_embeddings(plan.new_texts, batch_size=self.embed_batch_size)
+            if plan.new_ids else []
+        )
+        return item
+
+    def _upsert(self, item):
+        counts = self.indexer.commit_upsert(item["plan"], item["embeddings"], digest=item["digest"])
+        for key, value in counts.items():
+            self.totals[key] += value
+        if self.flush_every and (self.stats["upsert"].items + 1) % self.flush_every == 0:
+            self.indexer.flush()
+        self.progress.update(1)
+        return item
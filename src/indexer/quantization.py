@@ -0,0 +1,61 @@
+import numpy as np
+
+# Number of set bits of every byte value, used for Hamming distances
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def quantize_int8(vectors):
+    """
+    Symmetric per-vector int8 quantization.
+
+    :return: ``(codes, scales)`` with ``vector ~= codes * scale``.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=-1) / 127
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[..., None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def int8_scores(codes, scales, queries, block_size=1024):
+    """
+    Approximate dot products of float ``queries`` with int8 ``codes``.
+    Codes are widened block by block so no full float copy is materialized
+    (small blocks stay in cache, which matters more than BLAS call overhead).
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+    for start in range(0, len(codes), block_size):
+        block = np.asarray(codes[start:start + block_size], dtype=np.float32)
+        scores[:, start:start + block_size] = (
+            queries @ block.T
+        ) * np.asarray(scales[start:start + block_size])
+    return scores
+
+
+def quantize_binary(vectors):
+    """Sign bits of every dimension, packed 8 per byte."""
+    return np.packbits(np.asarray(vectors) > 0, axis=-1)
+
+
+def hamming_distances(codes, bits):
+    """Hamming distance between every row of packed ``codes`` and packed ``bits``."""
+    if hasattr(np, "bitwise_count") and codes.shape[1] % 8 == 0:
+        # numpy >= 2: popcount 64 bits at a time
+        xor = np.bitwise_xor(codes.view(np.uint64), bits.view(np.uint64))
+        return np.bitwise_count(xor).sum(axis=1, dtype=np.int32)
+    return POPCOUNT[np.bitwise_xor(codes, bits)].sum(axis=1, dtype=np.int32)
+
+
+def binary_scores(codes, queries, block_size=65536):
+    """
+    Negative Hamming distance between the packed sign bits of ``queries``
+    and ``codes`` (higher is more similar).
+    """
+    query_bits = quantize_binary(queries)
+    scores = np.empty((len(query_bits), len(codes)), dtype=np.float32)
+    for start in range(0, len(codes), block_size):
+        block = np.ascontiguousarray(codes[start:start + block_size])
+        for i, bits in enumerate(query_bits):
+            scores[i, start:start + block_size] = -hamming_distances(block, bits)
+    return scores
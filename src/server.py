@@ -0,0 +1,136 @@
+"""
+Long-running HTTP entry point: loads the embedder, index and generator once
+and answers queries over HTTP. Concurrent requests are merged into
+micro-batches before reaching the embedding model.
+
+    python server.py --port 8000
+    python server.py --generator stub      # no LLM / network needed
+    python server.py --generator replay    # answers from a recorded trace
+
+Endpoints:
+    POST /query    {"query": "...", "top_k": 5}  ->  {"query", "answer"}
+    GET  /metrics  batching and cache statistics
+    GET  /metrics/prometheus  spans, token counts and cache hit rates
+                              (Prometheus text format, needs ``tracing.enabled``)
+    GET  /health
+"""
+
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import yaml
+
+from engine.batching import MicroBatchEmbedder
+from engine.rag_engine import RAGEngine
+from engine.reranker import create_reranker
+from engine.tracing import create_tracer, get_tracer
+from generator.factory import GENERATOR_BACKENDS, create_generator
+from indexer.factory import create_indexer
+
+
+def make_handler(engine, batcher):
+    class RAGRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            elif self.path == "/metrics":
+                self._send_json(200, {
+                    "batching": batcher.stats(),
+                    "cache": engine.cache_stats(),
+                    "reranker": engine.reranker.stats() if engine.reranker else None,
+                })
+            elif self.path == "/metrics/prometheus":
+                body = get_tracer().prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        def do_POST(self):
+            if self.path != "/query":
+                self._send_json(404, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                query = request["query"]
+                top_k = int(request.get("top_k", 5))
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {"error": f"Invalid request: {e}"})
+                return
+            try:
+                answer = engine.generate_answer(query, top_k, use_history=False)
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, {"query": query, "answer": answer})
+
+        def log_message(self, format, *args):
+            pass
+
+    return RAGRequestHandler
+
+
+def create_server(config, host, port, generator_backend=None,
+                  max_batch_size=16, max_wait_ms=5):
+    # Installed first so every component built below reports to it
+    create_tracer(config)
+    indexer = create_indexer(config)
+    batcher = MicroBatchEmbedder(
+        indexer.embedding_model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+    )
+    indexer.embedding_model = batcher
+    engine = RAGEngine(
+        indexer=indexer,
+        generator=create_generator(config, generator_backend),
+        reranker=create_reranker(config),
+        **(config.get("engine") or {}),
+    )
+    return ThreadingHTTPServer((host, port), make_handler(engine, batcher))
+
+
+def main():
+    with open("config.yaml", "r") as file:
+        config = yaml.safe_load(file)
+    server_config = config.get("server") or {}
+
+    parser = argparse.ArgumentParser(description="Serve the RAG engine over HTTP")
+    parser.add_argument("--host", default=server_config.get("host", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=server_config.get("port", 8000))
+    parser.add_argument("--max_batch_size", type=int, default=server_config.get("max_batch_size", 16))
+    parser.add_argument("--max_wait_ms", type=float, default=server_config.get("max_wait_ms", 5))
+    parser.add_argument("--generator", choices=GENERATOR_BACKENDS, default=None,
+                        help="Overrides generator.backend; 'stub' / 'replay' serve without calling the LLM")
+    args = parser.parse_args()
+
+    server = create_server(
+        config,
+        args.host,
+        args.port,
+        generator_backend=args.generator,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+    )
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Regression tests for IVFIndex deletes (run with ``python -m pytest test_ivf_index.py``)
+"""
+
+import numpy as np
+
+from indexer.ivf import IVFIndex
+
+
+def make_index(path, count=12):
+    index = IVFIndex("test", None, 8, str(path), nlist=2, nprobe=2, train_size=count)
+    vectors = np.random.default_rng(0).standard_normal((count, 8)).astype(np.float32)
+    ids = [f"id{i}" for i in range(count)]
+    index.upsert_vectors(ids, vectors, [{"text": id} for id in ids])
+    assert index.centroids is not None
+    return index, dict(zip(ids, index._normalize(vectors)))
+
+
+def test_delete_last_row_then_query(tmp_path):
+    index, vectors = make_index(tmp_path)
+    index.query_many([vectors["id0"]], top_k=12)  # builds the inverted lists
+    index.delete(["id11"])
+
+    (result,) = index.query_many([vectors["id0"]], top_k=12)
+    found = [match.id for match in result.matches]
+    assert "id11" not in found
+    assert sorted(found) == sorted(f"id{i}" for i in range(11))
+
+
+def test_delete_moved_row_keeps_ids_and_scores(tmp_path):
+    index, vectors = make_index(tmp_path)
+    index.query_many([vectors["id0"]], top_k=12)
+    index.delete(["id3", "id11"])
+
+    (result,) = index.query_many([vectors["id10"]], top_k=12)
+    assert len(result.matches) == 10
+    for match in result.matches:
+        assert match.id not in ("id3", "id11")
+        assert match.metadata["text"] == match.id
+        assert np.isclose(match.score, vectors[match.id] @ vectors["id10"], atol=1e-5)
+    assert result.matches[0].id == "id10"
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    for test in (test_delete_last_row_then_query, test_delete_moved_row_keeps_ids_and_scores):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(tmp)
+        print(f"{test.__name__} passed")
@@ -0,0 +1,68 @@
+"""
+Tests for the reranker's time budget (run with ``python -m pytest test_reranker.py``)
+"""
+
+import time
+from types import SimpleNamespace
+
+from engine.reranker import CrossEncoderReranker
+from indexer.base import QueryResult
+
+
+class SleepyModel:
+    """Cross-encoder stand-in: scores by text length, sleeping ``delays`` seconds per batch."""
+
+    def __init__(self, delays, default_delay=0.0):
+        self.delays = list(delays)
+        self.default_delay = default_delay
+        self.calls = 0
+
+    def predict(self, batch):
+        self.calls += 1
+        time.sleep(self.delays.pop(0) if self.delays else self.default_delay)
+        return [len(text) for _, text in batch]
+
+
+def make_results(count=8):
+    return QueryResult(matches=[
+        SimpleNamespace(id=str(i), score=0.0, metadata={"text": "x" * i}) for i in range(count)
+    ])
+
+
+def test_recovers_after_slow_batch():
+    reranker = CrossEncoderReranker("model", batch_size=4, time_budget_ms=300)
+    # One 400 ms outlier (e.g. a cold start), then fast batches
+    reranker._model = SleepyModel([0.4])
+    reranker.rerank("q", make_results(), top_n=3)
+    assert reranker.stats()["fallbacks"] == 1
+
+    for _ in range(5):
+        result = reranker.rerank("q", make_results(), top_n=3)
+    assert [match.id for match in result.matches] == ["7", "6", "5"]
+    assert reranker.stats()["reranked"] >= 1
+    assert reranker.stats()["batch_ms"] < 300
+
+
+class SlowLoadingReranker(CrossEncoderReranker):
+    """Reranker whose model takes 400 ms to load, like a cold cross-encoder."""
+
+    @property
+    def model(self):
+        if self._model is None:
+            time.sleep(0.4)
+            self._model = SleepyModel([], default_delay=0.01)
+        return self._model
+
+
+def test_model_load_is_not_timed():
+    reranker = SlowLoadingReranker("model", batch_size=4, time_budget_ms=300)
+    result = reranker.rerank("q", make_results(), top_n=3)
+    assert [match.id for match in result.matches] == ["7", "6", "5"]
+    assert reranker.stats()["fallbacks"] == 0
+    assert reranker.stats()["batch_ms"] < 300
+
+
+if __name__ == "__main__":
+    for test in (test_recovers_after_slow_batch, test_model_load_is_not_timed):
+        test()
+        print(f"{test.__name__} passed")